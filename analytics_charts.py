@@ -0,0 +1,105 @@
+"""Charts for the GUI's Analytics page, rendered off the Tk thread and cached.
+
+ChartCache.refresh() starts a background thread that ingests new results CSVs into the
+AnalyticsStore and, only when something new landed (or nothing has been rendered yet),
+redraws the charts from the store's aggregates into PIL images. The Tk thread just
+checks ChartCache.version and swaps in the new images.
+"""
+import threading
+from PIL import Image
+from config import DATA_FOLDER, ANALYTICS_CHART_SIZE
+from analytics_store import AnalyticsStore
+
+CHARTS = ("Agent Frequency", "Role Distribution", "Selection Time", "Confirmation Time")
+BACKGROUND = "#2b2b2b"
+FOREGROUND = "white"
+BAR_COLOR = "#5D8BF4"
+
+
+def _figure(size, dpi=100):
+    # Figure + Agg canvas rather than pyplot, which is not safe to use off the main thread
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.ticker import MaxNLocator
+    figure = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi, facecolor=BACKGROUND)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.set_facecolor(BACKGROUND)
+    axes.tick_params(colors=FOREGROUND)
+    axes.yaxis.set_major_locator(MaxNLocator(integer=True))  # Counts of picks
+    for spine in axes.spines.values():
+        spine.set_color(FOREGROUND)
+    return figure, axes
+
+
+def _to_image(figure):
+    figure.tight_layout()
+    figure.canvas.draw()
+    size = figure.canvas.get_width_height()
+    return Image.frombuffer("RGBA", size, figure.canvas.buffer_rgba(), "raw", "RGBA", 0, 1).copy()
+
+
+def render_charts(store, size=ANALYTICS_CHART_SIZE):
+    """Return {chart title: PIL image} drawn from the store's aggregates."""
+    images = {}
+    figure, axes = _figure(size)
+    frequency = store.agent_frequency()
+    axes.bar([agent for agent, _, _ in frequency], [picks for _, _, picks in frequency], color=BAR_COLOR)
+    axes.tick_params(axis='x', labelrotation=45)
+    axes.set_title("Agent Frequency", color=FOREGROUND)
+    images["Agent Frequency"] = _to_image(figure)
+
+    figure, axes = _figure(size)
+    roles = store.role_distribution()
+    if roles:
+        axes.pie(list(roles.values()), labels=[role.capitalize() for role in roles], autopct='%1.1f%%',
+                 startangle=90, textprops={'color': FOREGROUND})
+    axes.set_title("Role Distribution", color=FOREGROUND)
+    images["Role Distribution"] = _to_image(figure)
+
+    for title, kind in (("Selection Time", "selected"), ("Confirmation Time", "confirmed")):
+        figure, axes = _figure(size)
+        histogram = store.time_histogram(kind)
+        axes.bar([start for start, _ in histogram], [count for _, count in histogram], width=store.time_bucket,
+                 align='edge', color=BAR_COLOR)
+        axes.set_xlabel("seconds after the starting screen", color=FOREGROUND)
+        axes.set_title(title, color=FOREGROUND)
+        images[title] = _to_image(figure)
+    return images
+
+
+class ChartCache:
+    """Latest rendered charts plus a background refresh that only redraws when new data arrives."""
+
+    def __init__(self, folder=DATA_FOLDER, store_factory=AnalyticsStore):
+        self.folder = folder
+        self.store_factory = store_factory
+        self.store = None
+        self.images = None  # {chart title: PIL image} once rendered
+        self.version = 0  # Bumped whenever images is replaced
+        self.picks = 0
+        self.error = None
+        self._thread = None
+
+    @property
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self):
+        """Start a background refresh unless one is already running."""
+        if self.busy:
+            return
+        self._thread = threading.Thread(target=self._refresh, name="ChartRefresh", daemon=True)
+        self._thread.start()
+
+    def _refresh(self):
+        try:
+            if self.store is None:
+                self.store = self.store_factory()
+            if self.store.ingest(self.folder) or self.images is None:
+                self.images = render_charts(self.store)
+                self.picks = self.store.total_picks()
+                self.version += 1
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
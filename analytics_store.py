@@ -0,0 +1,159 @@
+"""SQLite store of every recorded pick, with running aggregates for the analytics views.
+
+ingest() adds results CSVs (the GUI exports and replay outputs in DATA_FOLDER) that
+are new or changed since the last run; each file is read once. Per-agent pick counts,
+timing sums and timing histograms are updated in the same transaction, so the
+queries read a few dozen aggregate rows however large the archive grows.
+
+Usage: python analytics_store.py [FOLDER] [--db cache/analytics.sqlite]
+"""
+import argparse
+import csv
+import os
+import sqlite3
+from config import AGENT_ROLES, ANALYTICS_DB_PATH, ANALYTICS_TIME_BUCKET, DATA_FOLDER
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, picks INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS picks (
+    id INTEGER PRIMARY KEY, file TEXT NOT NULL, area INTEGER, agent TEXT NOT NULL, role TEXT NOT NULL,
+    confidence REAL, selected REAL, confirmed REAL);
+CREATE INDEX IF NOT EXISTS picks_file ON picks (file);
+CREATE TABLE IF NOT EXISTS agent_stats (
+    agent TEXT PRIMARY KEY, role TEXT NOT NULL, picks INTEGER NOT NULL,
+    selected_sum REAL NOT NULL, selected_count INTEGER NOT NULL,
+    confirmed_sum REAL NOT NULL, confirmed_count INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS time_histogram (
+    kind TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (kind, bucket));
+"""
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None  # "Not selected" / "Not confirmed"
+
+
+def read_results_csv(path):
+    """Return (area, agent, role, confidence, selected, confirmed) rows from a results CSV."""
+    rows = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 6 or row[0] == 'Area':
+                continue  # Header or malformed line
+            agent = row[1].strip().lower()
+            role = row[2].strip().lower() or AGENT_ROLES.get(agent, "Unknown")
+            area = int(row[0].split()[-1]) if row[0].split()[-1].isdigit() else None
+            rows.append((area, agent, role, _parse_float(row[3]), _parse_float(row[4]), _parse_float(row[5])))
+    return rows
+
+
+class AnalyticsStore:
+    """Incrementally ingested pick history plus aggregates for constant-time queries."""
+
+    def __init__(self, path=ANALYTICS_DB_PATH, time_bucket=ANALYTICS_TIME_BUCKET):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # The analytics page queries from a background thread
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.time_bucket = time_bucket
+
+    def close(self):
+        self.db.close()
+
+    def ingest(self, folder=DATA_FOLDER):
+        """Add new or changed results CSVs in folder; returns the number of files ingested."""
+        known = {path: (size, mtime) for path, size, mtime in self.db.execute("SELECT path, size, mtime FROM files")}
+        changed = False
+        ingested = 0
+        with self.db:
+            for entry in sorted(os.listdir(folder)):
+                path = os.path.join(folder, entry)
+                if not entry.endswith('.csv') or not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                if known.get(path) == (stat.st_size, stat.st_mtime):
+                    continue
+                if path in known:
+                    # Rewritten file: drop its old picks, aggregates are rebuilt below
+                    self.db.execute("DELETE FROM picks WHERE file = ?", (path,))
+                    changed = True
+                rows = read_results_csv(path)
+                self.db.executemany("INSERT INTO picks (file, area, agent, role, confidence, selected, confirmed) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?)", [(path,) + row for row in rows])
+                self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                (path, stat.st_size, stat.st_mtime, len(rows)))
+                if not changed:
+                    self._add_to_aggregates(rows)
+                ingested += 1
+            if changed:
+                self._rebuild_aggregates()
+        return ingested
+
+    def _add_to_aggregates(self, rows):
+        self.db.executemany(
+            "INSERT INTO agent_stats VALUES (?, ?, 1, ?, ?, ?, ?) ON CONFLICT (agent) DO UPDATE SET "
+            "picks = picks + 1, selected_sum = selected_sum + excluded.selected_sum, "
+            "selected_count = selected_count + excluded.selected_count, "
+            "confirmed_sum = confirmed_sum + excluded.confirmed_sum, "
+            "confirmed_count = confirmed_count + excluded.confirmed_count",
+            [(agent, role, selected or 0.0, selected is not None, confirmed or 0.0, confirmed is not None)
+             for _, agent, role, _, selected, confirmed in rows])
+        buckets = [(kind, int(value // self.time_bucket))
+                   for _, _, _, _, selected, confirmed in rows
+                   for kind, value in (("selected", selected), ("confirmed", confirmed)) if value is not None]
+        self.db.executemany("INSERT INTO time_histogram VALUES (?, ?, 1) ON CONFLICT (kind, bucket) DO UPDATE SET "
+                            "count = count + 1", buckets)
+
+    def _rebuild_aggregates(self):
+        self.db.execute("DELETE FROM agent_stats")
+        self.db.execute("DELETE FROM time_histogram")
+        self._add_to_aggregates(self.db.execute(
+            "SELECT area, agent, role, confidence, selected, confirmed FROM picks").fetchall())
+
+    def total_picks(self):
+        return self.db.execute("SELECT COALESCE(SUM(picks), 0) FROM agent_stats").fetchone()[0]
+
+    def agent_frequency(self):
+        """Return [(agent, role, picks)] sorted by picks, most picked first."""
+        return self.db.execute("SELECT agent, role, picks FROM agent_stats ORDER BY picks DESC, agent").fetchall()
+
+    def role_distribution(self):
+        """Return {role: picks}."""
+        return dict(self.db.execute("SELECT role, SUM(picks) FROM agent_stats GROUP BY role ORDER BY 2 DESC"))
+
+    def mean_times(self):
+        """Return {agent: (mean selection time, mean confirmation time)}, None where never recorded."""
+        return {agent: (selected_sum / selected_count if selected_count else None,
+                        confirmed_sum / confirmed_count if confirmed_count else None)
+                for agent, selected_sum, selected_count, confirmed_sum, confirmed_count in self.db.execute(
+                    "SELECT agent, selected_sum, selected_count, confirmed_sum, confirmed_count FROM agent_stats")}
+
+    def time_histogram(self, kind):
+        """Return [(bucket start in seconds, count)] for kind "selected" or "confirmed"."""
+        return [(bucket * self.time_bucket, count) for bucket, count in self.db.execute(
+            "SELECT bucket, count FROM time_histogram WHERE kind = ? ORDER BY bucket", (kind,))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest results CSVs into the analytics store and summarise them.")
+    parser.add_argument("folder", nargs="?", default=DATA_FOLDER)
+    parser.add_argument("--db", default=ANALYTICS_DB_PATH)
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.db)
+    print(f"Ingested {store.ingest(args.folder)} new file(s); {store.total_picks()} picks in total")
+    print("\nTop 5 Most Frequent Agents:")
+    for agent, role, picks in store.agent_frequency()[:5]:
+        print(f"  {agent:<12} {role:<10} {picks}")
+    print("\nRoles by Frequency:")
+    for role, picks in store.role_distribution().items():
+        print(f"  {role:<12} {picks}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import cv2
+import numpy as np
+from config import ASSET_CACHE_PATH, DEFAULT_IMAGE_FOLDER, SELECTED_IMAGE_FOLDER, START_SCREEN_FOLDER, \
+    DISPLAY_AGENTS_FOLDER, MAX_WIDTH, MAX_HEIGHT, START_AREA, THUMBNAIL_SIZE, IMAGE_EXTENSIONS
+from calibration import active_layout
+
+# File layout: MAGIC, 8-byte little-endian index length, JSON index, zero padding to
+# DATA_ALIGNMENT, then the raw uint8 pixel data of every entry back to back.
+MAGIC = b"VASCACHE"
+DATA_ALIGNMENT = 64
+# Pixel mode of the GUI thumbnails; many portraits are palette images, whose raw arrays are palette indices
+THUMBNAIL_MODE = "RGBA"
+
+# Assets loaded by load_reference_assets per layout scale, kept for the lifetime of the process
+_reference_assets = {}
+
+
+class CachedAsset:
+    """Describes one preprocessed image: where it comes from and how to build it."""
+
+    __slots__ = ('key', 'source_path', 'params', 'build')
+
+    def __init__(self, key, source_path, params, build):
+        self.key = key
+        self.source_path = source_path
+        self.params = params  # Anything that changes the preprocessing, e.g. target size
+        self.build = build  # Called with source_path, returns a uint8 array
+
+
+def load_cached(assets, path=ASSET_CACHE_PATH):
+    """Return {key: array} for the given CachedAssets, using the cache file where it is still valid.
+
+    When every entry is current the arrays are read-only views into a memory-mapped
+    copy of the file. Otherwise the changed entries are rebuilt, the file is rewritten
+    (keeping the entries other callers stored there) and in-memory arrays are returned.
+    """
+    index, data_offset = _read_index(path)
+    valid = {}
+    index_changed = False
+    for asset in assets:
+        entry = index.get(asset.key)
+        if entry is None or entry['params'] != _params_key(asset.params):
+            continue
+        stat = os.stat(asset.source_path)
+        if entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            valid[asset.key] = entry
+        elif entry['sha1'] == _file_hash(asset.source_path):
+            # Touched but not modified (e.g. after a checkout): keep the data, refresh the stamp
+            entry['mtime'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+            valid[asset.key] = entry
+            index_changed = True
+
+    if len(valid) == len(assets) and not index_changed:
+        data = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset) if assets else None
+        return {asset.key: _entry_array(data, valid[asset.key]) for asset in assets}
+
+    # Read the old data into memory so nothing stays mapped while the file is replaced
+    data = None
+    if index:
+        with open(path, 'rb') as f:
+            f.seek(data_offset)
+            data = np.frombuffer(f.read(), dtype=np.uint8)
+    arrays = {}
+    new_index = {}
+    requested = {asset.key for asset in assets}
+    kept = {}  # Entries that were not asked for this time, carried over unchecked
+    for key, entry in index.items():
+        if key not in requested:
+            kept[key] = _entry_array(data, entry).copy()
+            new_index[key] = entry
+    for asset in assets:
+        entry = valid.get(asset.key)
+        if entry is not None:
+            arrays[asset.key] = _entry_array(data, entry).copy()
+            new_index[asset.key] = entry
+        else:
+            arrays[asset.key] = np.ascontiguousarray(asset.build(asset.source_path), dtype=np.uint8)
+            stat = os.stat(asset.source_path)
+            new_index[asset.key] = {'params': _params_key(asset.params), 'mtime': stat.st_mtime_ns,
+                                    'size': stat.st_size, 'sha1': _file_hash(asset.source_path)}
+    try:
+        _write(path, new_index, {**kept, **arrays})
+    except OSError as e:
+        print(f"Could not write asset cache {path}: {e}")
+    return arrays
+
+
+def load_reference_assets(layout=None):
+    """Return the scanner templates, starting screen image and GUI thumbnails, loading them on first use.
+
+    The result is a dict with 'templates' ({reference name: BGR image}, selected-state images
+    prefixed with 'selected_'), 'start_variants' ({file name: BGR image}, one per starting screen
+    image), 'start' (the first variant or None) and 'thumbnails' ({agent: RGBA image}).
+    Templates and the starting screen image are scaled for the layout (the active one by default).
+    """
+    scale = (layout or active_layout()).scale
+    if scale in _reference_assets:
+        return _reference_assets[scale]
+
+    template_size = [MAX_WIDTH, MAX_HEIGHT, scale]
+    start_size = [START_AREA[2], START_AREA[3], scale]
+    assets = []
+    templates = []
+    for folder, prefix in ((DEFAULT_IMAGE_FOLDER, ""), (SELECTED_IMAGE_FOLDER, "selected_")):
+        for image_file in _image_files(folder):
+            key = f"template:{folder}{image_file}"
+            assets.append(CachedAsset(key, os.path.join(folder, image_file), template_size,
+                                      lambda path: _load_resized(path, *template_size)))
+            templates.append((f"{prefix}{image_file}", key))
+    start_files = sorted(_image_files(START_SCREEN_FOLDER))
+    for image_file in start_files:
+        assets.append(CachedAsset(f"start:{image_file}", os.path.join(START_SCREEN_FOLDER, image_file), start_size,
+                                  lambda path: _load_resized(path, *start_size)))
+    thumbnails = []
+    for image_file in _image_files(DISPLAY_AGENTS_FOLDER, ('.png',)):
+        key = f"thumbnail:{image_file}"
+        assets.append(CachedAsset(key, os.path.join(DISPLAY_AGENTS_FOLDER, image_file),
+                                  list(THUMBNAIL_SIZE) + [THUMBNAIL_MODE], _load_thumbnail))
+        thumbnails.append((os.path.splitext(image_file)[0], key))
+
+    # One file per scale: calibrating to a new scale never replaces a file another layout has mapped
+    arrays = load_cached(assets, scale_cache_path(scale))
+    _reference_assets[scale] = {
+        'templates': {name: arrays[key] for name, key in templates},
+        'start_variants': {image_file: arrays[f"start:{image_file}"] for image_file in start_files},
+        'start': arrays[f"start:{start_files[0]}"] if start_files else None,
+        'thumbnails': {agent_name: arrays[key] for agent_name, key in thumbnails},
+    }
+    return _reference_assets[scale]
+
+
+def scale_cache_path(scale, path=ASSET_CACHE_PATH):
+    """Return the cache file for assets prepared at a layout scale, e.g. cache/reference_assets_1.5.bin."""
+    root, ext = os.path.splitext(path)
+    return f"{root}_{scale:g}{ext}"
+
+
+def load_start_image():
+    """Load the starting screen reference at its 1080p size (used for calibration), or None."""
+    start_files = sorted(_image_files(START_SCREEN_FOLDER))
+    if not start_files:
+        return None
+    return _load_resized(os.path.join(START_SCREEN_FOLDER, start_files[0]), START_AREA[2], START_AREA[3])
+
+
+def _image_files(folder, extensions=IMAGE_EXTENSIONS):
+    return [f for f in os.listdir(folder) if f.lower().endswith(extensions)]
+
+
+def _load_resized(path, max_width, max_height, layout_scale=1.0):
+    """Load an image as BGR, shrinking it to fit max_width x max_height, then scaling it for the layout."""
+    img = cv2.imread(path)
+    height, width = img.shape[:2]
+    if width > max_width or height > max_height:
+        scale = min(max_width / width, max_height / height)
+        new_width = int(width * scale)
+        new_height = int(height * scale)
+        img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    if layout_scale != 1.0:
+        height, width = img.shape[:2]
+        size = (max(int(round(width * layout_scale)), 1), max(int(round(height * layout_scale)), 1))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA if layout_scale < 1 else cv2.INTER_LINEAR)
+    return img
+
+
+def _load_thumbnail(path):
+    """Load a GUI agent portrait as THUMBNAIL_MODE pixels resized to THUMBNAIL_SIZE with PIL."""
+    from PIL import Image
+    image = Image.open(path).convert(THUMBNAIL_MODE)
+    return np.asarray(image.resize(THUMBNAIL_SIZE, Image.Resampling.LANCZOS))
+
+
+def _read_index(path):
+    """Return (index, data_offset) from the cache file, or an empty index if it is missing or unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return {}, 0
+            length = int.from_bytes(f.read(8), 'little')
+            index = json.loads(f.read(length).decode('utf-8'))
+    except (OSError, ValueError):
+        return {}, 0
+    return index, _aligned(len(MAGIC) + 8 + length)
+
+
+def _write(path, index, arrays):
+    """Write the index and arrays to a temporary file and move it over path."""
+    offset = 0
+    for key, entry in index.items():
+        entry['offset'] = offset
+        entry['shape'] = list(arrays[key].shape)
+        offset += _aligned(arrays[key].nbytes)
+    header = json.dumps(index).encode('utf-8')
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+        for key in index:
+            array = arrays[key]
+            f.write(array.tobytes())
+            f.write(b"\0" * (_aligned(array.nbytes) - array.nbytes))
+    os.replace(temp_path, path)
+
+
+def _entry_array(data, entry):
+    start = entry['offset']
+    shape = tuple(entry['shape'])
+    return data[start:start + int(np.prod(shape))].reshape(shape)
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _aligned(size):
+    return -(-size // DATA_ALIGNMENT) * DATA_ALIGNMENT
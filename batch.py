@@ -0,0 +1,108 @@
+"""Replay a folder of recorded lobbies in parallel and write one results CSV per lobby.
+
+Usage: python batch.py RECORDINGS_FOLDER [--workers N] [--output-folder data/] [--scaling]
+
+Each entry of RECORDINGS_FOLDER is one lobby: a video file or a folder of screenshots.
+The matching banks are built once and shared with the worker processes through shared
+memory; the reference images are memory-mapped from the asset cache.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import DATA_FOLDER, REPLAY_FRAME_INTERVAL
+from scanner import load_references, use_shared_references
+from replay import replay_lobby
+from export import write_results_csv
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.webm')
+
+
+def find_recordings(folder):
+    """Return the video files and screenshot folders directly inside folder, sorted by name."""
+    recordings = []
+    for entry in sorted(os.listdir(folder)):
+        path = os.path.join(folder, entry)
+        if os.path.isdir(path) or entry.lower().endswith(VIDEO_EXTENSIONS):
+            recordings.append(path)
+    return recordings
+
+
+def output_path(recording, output_folder):
+    name = os.path.splitext(os.path.basename(os.path.normpath(recording)))[0]
+    return os.path.join(output_folder, f"valorant_scanner_replay_{name}.csv")
+
+
+def process_recording(recording, output_folder, frame_interval=REPLAY_FRAME_INTERVAL):
+    """Replay one lobby and write its CSV; returns (recording, frames, seconds, csv path or None)."""
+    replay = replay_lobby(recording, frame_interval, stop_when_locked=True)
+    csv_path = None
+    if replay.results:
+        csv_path = output_path(recording, output_folder)
+        write_results_csv(csv_path, replay.results)
+    return recording, replay.frames, replay.elapsed, csv_path
+
+
+def run_batch(recordings, workers, output_folder=DATA_FOLDER, frame_interval=REPLAY_FRAME_INTERVAL, verbose=True):
+    """Process recordings on a pool of workers; returns (total frames, wall seconds)."""
+    os.makedirs(output_folder, exist_ok=True)
+    handle, blocks = load_references().share()
+    total_frames = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=use_shared_references,
+                                 initargs=(handle,)) as pool:
+            jobs = [pool.submit(process_recording, recording, output_folder, frame_interval)
+                    for recording in recordings]
+            for job in jobs:
+                recording, frames, seconds, csv_path = job.result()
+                total_frames += frames
+                if verbose:
+                    print(f"  {recording}: {frames} frames in {seconds:.2f} s -> {csv_path or 'no results'}")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return total_frames, time.perf_counter() - started
+
+
+def print_throughput(workers, lobbies, frames, seconds, baseline=None):
+    speedup = f"{baseline / seconds:5.2f}x" if baseline else "    -"
+    print(f"{workers:>7} | {seconds:8.2f} | {frames / seconds:10.1f} | {lobbies / seconds * 60:11.1f} | {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay many recorded lobbies in parallel.")
+    parser.add_argument("folder", help="folder containing video files and/or screenshot folders")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-folder", default=DATA_FOLDER)
+    parser.add_argument("--interval", type=float, default=REPLAY_FRAME_INTERVAL,
+                        help="seconds between screenshots when replaying a folder")
+    parser.add_argument("--scaling", action="store_true",
+                        help="run with 1, 2, 4, ... up to --workers workers and compare throughput")
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.folder)
+    if not recordings:
+        print(f"No recordings found in {args.folder}")
+        return
+
+    worker_counts = [args.workers]
+    if args.scaling:
+        worker_counts = sorted({min(2 ** i, args.workers) for i in range(args.workers.bit_length() + 1)})
+
+    results = []
+    for workers in worker_counts:
+        print(f"Processing {len(recordings)} lobbies with {workers} worker(s)")
+        frames, seconds = run_batch(recordings, workers, args.output_folder, args.interval,
+                                    verbose=len(worker_counts) == 1)
+        results.append((workers, frames, seconds))
+
+    print("workers |   wall s | frames/sec | lobbies/min | speedup")
+    baseline = results[0][2] if results[0][0] == 1 else None
+    for workers, frames, seconds in results:
+        print_throughput(workers, len(recordings), frames, seconds, baseline)
+
+
+if __name__ == "__main__":
+    main()
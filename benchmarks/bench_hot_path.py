@@ -0,0 +1,189 @@
+"""Latency and allocation benchmark for the capture -> match -> render hot path.
+
+Drives compare_images, five-area identification (per engine), a full ScanSession tick,
+starting screen detection and the GUI area previews (the old new-image-per-tick path
+and the reused PreviewBuffers) against synthetic frames built
+from the bundled reference images. Needs no display.
+
+Run from the repository root:
+    python -m benchmarks.bench_hot_path [--iterations N] [--roster N] [--json results.json]
+
+--roster grows the reference set to N templates (mirrored copies of the bundled ones)
+to see how the hot path scales as agents are added.
+"""
+import argparse
+import itertools
+import json
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from PIL import Image
+from config import AREAS, AREA_PREVIEW_SIZE, MATCH_ENGINE
+from scanner import ScanSession, ReferenceSet, compare_images, identify_areas, load_references, set_references
+from previews import PreviewBuffers
+from benchmarks.synthetic import make_frame, random_slots
+
+ENGINES = ("coarse", "masked", "batched", "template")
+
+
+def area_preview(screen_area, size=AREA_PREVIEW_SIZE):
+    """The old GUI preview path: a new RGB PIL image per area and tick."""
+    screen_area_rgb = cv2.cvtColor(screen_area, cv2.COLOR_BGR2RGB)
+    return Image.fromarray(screen_area_rgb).resize(size, Image.Resampling.LANCZOS)
+
+
+def percentiles(latencies):
+    values = np.array(latencies) * 1000
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)), "max": float(values.max())}
+
+
+def measure(stage, iterations, warmup=3):
+    """Time iterations calls of stage() and return their latencies in seconds."""
+    for _ in range(warmup):
+        stage()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        stage()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure_allocations(stage, iterations=5):
+    """Return (peak KiB allocated during a call, KiB still held afterwards), averaged over iterations.
+
+    Only Python and NumPy allocations are visible to tracemalloc; OpenCV's own buffers are not.
+    """
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            stage()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(peaks)) / 1024, float(np.mean(retained)) / 1024
+
+
+def extend_roster(references, size):
+    """Return a ReferenceSet with at least size templates, padding with mirrored copies."""
+    reference_images = dict(references.reference_images)
+    for name, image in itertools.cycle(list(references.reference_images.items())):
+        if len(reference_images) >= size:
+            break
+        copy_name = f"mirror{len(reference_images)}_{name}"
+        reference_images[copy_name] = np.ascontiguousarray(image[:, ::-1])
+    return ReferenceSet(reference_images, references.start_reference)
+
+
+def build_stages(frames, start_frames, engines, references):
+    cycle = itertools.cycle(frames)
+    start_cycle = itertools.cycle(start_frames)
+    names = list(references.reference_images)
+    rng = np.random.default_rng(1)
+    stages = {}
+
+    def compare_stage():
+        screen_area = next(cycle).crop(*AREAS[0])
+        compare_images(screen_area, references.reference_images[names[rng.integers(len(names))]])
+    stages["compare_images"] = compare_stage
+
+    for engine in engines:
+        stages[f"identify[{engine}]"] = lambda engine=engine: identify_areas(next(cycle).crop_areas(AREAS), engine)
+
+    session = ScanSession()
+    session.start_screen_confirmed = True
+
+    def scan_stage():
+        frame = next(cycle)
+        if session.locked_count == len(AREAS):
+            session.reset()
+            session.start_screen_confirmed = True
+        session.scan(0.0, frame)
+    stages["scan tick"] = scan_stage
+
+    start_session = ScanSession()
+
+    def start_stage(frames):
+        start_session.start_screen_confirmed = False
+        start_session.check_start_screen(next(frames))
+    stages["start screen"] = lambda: start_stage(start_cycle)
+    # Waiting in a menu that does not change: the detector reuses its last score
+    static_menu = itertools.repeat(start_frames[0])
+    stages["start screen (static menu)"] = lambda: start_stage(static_menu)
+
+    try:
+        import customtkinter as ctk
+    except Exception:
+        ctk = None
+
+    def preview_stage():
+        frame = next(cycle)
+        for screen_area in frame.crop_areas(AREAS):
+            pil_img = area_preview(screen_area)
+            if ctk is not None:
+                ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=pil_img.size)
+    stages["area previews" if ctk is None else "area previews + CTkImage"] = preview_stage
+
+    buffers = PreviewBuffers(len(AREAS))
+
+    def buffered_preview_stage():
+        frame = next(cycle)
+        for i, screen_area in enumerate(frame.crop_areas(AREAS)):
+            buffers.update(i, screen_area)
+    stages["area previews (buffered)"] = buffered_preview_stage
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scanner hot path on synthetic frames.")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--template-iterations", type=int, default=10,
+                        help="iterations for the slow one-matchTemplate-per-pair engine")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--roster", type=int, default=0, help="grow the reference set to this many templates")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    references = load_references()
+    if args.roster > len(references.reference_images):
+        references = extend_roster(references, args.roster)
+        set_references(references)
+
+    rng = np.random.default_rng(0)
+    bundled = {name: image for name, image in references.reference_images.items() if not name.startswith("mirror")}
+    frames = []
+    slots = random_slots(rng, bundled)
+    for tick in range(64):
+        # Areas change every few ticks, as they do while players hover and lock
+        if tick % 4 == 0:
+            slots = random_slots(rng, bundled)
+        frames.append(make_frame(rng, bundled, slots, timestamp=tick * 0.15))
+    start_frames = [make_frame(rng, bundled, [None] * len(AREAS), references.start_reference if i % 2 else None)
+                    for i in range(8)]
+
+    print(f"{len(references.reference_images)} templates, {len(AREAS)} areas, configured engine: {MATCH_ENGINE}")
+    print(f"{'stage':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'peak KiB':>9} {'kept KiB':>9}")
+    report = {"templates": len(references.reference_images), "stages": {}}
+    for name, stage in build_stages(frames, start_frames, args.engines, references).items():
+        iterations = args.template_iterations if name == "identify[template]" else args.iterations
+        stats = percentiles(measure(stage, iterations))
+        stats["peak_kib"], stats["retained_kib"] = measure_allocations(stage)
+        report["stages"][name] = stats
+        print(f"{name:<26} {stats['p50']:8.2f} {stats['p95']:8.2f} {stats['p99']:8.2f} {stats['max']:8.2f} "
+              f"{stats['peak_kib']:9.1f} {stats['retained_kib']:9.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Measure live feed latency and check that a stalled client never holds up the scan loop.
+
+A LiveFeed on a free local port gets two clients: one that reads as fast as it can
+and one that connects and then stops reading. A simulated scan loop publishes bursts
+of slot events. Reports how long publish() takes on the scan thread, the delay from
+publish() to the fast client's receipt, how far the stalled client's server-side
+backlog grew, and whether the stalled client ends on the final lobby state once it
+reads again.
+
+Run from the repository root: python -m benchmarks.bench_live_feed [--events 20000]
+"""
+import argparse
+import socket
+import threading
+import time
+import numpy as np
+from config import AREAS
+from live_feed import LiveFeed, LiveFeedClient
+
+
+def read_all(client, received, until):
+    """Record (receive time, message) until a message with the given elapsed value (or the feed closes)."""
+    while True:
+        message = client.receive()
+        if message is None:
+            return
+        received.append((time.perf_counter(), message))
+        if message.get("elapsed") == until:
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live feed latency and backpressure.")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--burst", type=int, default=5, help="events published per simulated scan tick")
+    parser.add_argument("--tick", type=float, default=0.0005, help="seconds between simulated scan ticks")
+    args = parser.parse_args()
+
+    feed = LiveFeed(port=0)
+    feed.start()
+    fast = LiveFeedClient(port=feed.port)
+    stalled = LiveFeedClient(port=feed.port)
+    received = []
+    last = round((args.events - 1) * 0.001, 3)
+    reader = threading.Thread(target=read_all, args=(fast, received, last), daemon=True)
+    reader.start()
+    time.sleep(0.2)  # Let both handshakes finish
+    # Small kernel buffers on the stalled connection, so the feed's own backlog fills up quickly
+    stalled.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    stalled_client = next(client for client in feed.clients.values()
+                          if client.sock.getpeername() == stalled.sock.getsockname())
+    stalled_client.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+
+    agents = ["jett.png", "selected_sova_blue.png", "omen.png", "selected_killjoy_blue.png", "raze.png"]
+    lobby = feed.start_lobby()
+    published = {}
+    publish_times = []
+    backlog = 0
+    for start in range(0, args.events, args.burst):
+        events = [("lock" if k % 3 == 0 else "hover", k % len(AREAS), agents[k % len(agents)], 0.9, k * 0.001)
+                  for k in range(start, min(start + args.burst, args.events))]
+        before = time.perf_counter()
+        feed.publish(events)
+        after = time.perf_counter()
+        publish_times.append(after - before)
+        for event in events:
+            published[round(event[4], 3)] = before
+        backlog = max(backlog, len(stalled_client.backlog))
+        time.sleep(args.tick)
+    reader.join(30)
+
+    latencies = np.array([received_at - published[message["elapsed"]] for received_at, message in received
+                          if message.get("lobby") == lobby and "elapsed" in message]) * 1000
+    publish_us = np.array(publish_times) * 1e6
+    print(f"{args.events} events in bursts of {args.burst}, {len(feed.clients)} clients (one stalled)")
+    print(f"  publish(): median {np.median(publish_us):.1f} us, p99 {np.percentile(publish_us, 99):.1f} us, "
+          f"max {publish_us.max():.1f} us per burst")
+    print(f"  fast client: {len(latencies)} events received, latency median {np.median(latencies):.2f} ms, "
+          f"p99 {np.percentile(latencies, 99):.2f} ms")
+    print(f"  stalled client: backlog at most {backlog} messages (limit {feed.client_backlog}), "
+          f"resynced {stalled_client.resyncs} times")
+
+    # Unstall: the stalled client must end up with the final slots
+    stalled.sock.settimeout(1.0)
+    final = None
+    try:
+        while True:
+            message = stalled.receive()
+            if message is None:
+                break
+            final = message
+    except socket.timeout:
+        pass
+    final_slots = {message["area"]: message["agent"] for message in feed.slots if message}
+    if final is not None and final["event"] == "state":
+        caught_up = {message["area"]: message["agent"] for message in final["slots"] if message} == final_slots
+    else:
+        caught_up = final is not None and final.get("elapsed") == last
+    print(f"  stalled client caught up with the final state after reading again: {caught_up}")
+    fast.close()
+    stalled.close()
+    feed.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Compare the batched reference bank against one matchTemplate call per (area, template) pair.
+
+Run from the repository root: python -m benchmarks.bench_matcher [ticks]
+"""
+import sys
+import time
+import numpy as np
+from config import AREAS
+from scanner import reference_images, reference_bank, compare_images, identify_areas
+from benchmarks.synthetic import make_frame, random_slots
+
+
+def main(ticks=20):
+    rng = np.random.default_rng(0)
+    frames = [make_frame(rng, reference_images, random_slots(rng, reference_images)) for _ in range(ticks)]
+    names = list(reference_images)
+
+    timings = {"template": [], "batched": []}
+    max_difference = 0.0
+    mismatched_winners = 0
+    for frame in frames:
+        screen_areas = frame.crop_areas(AREAS)
+        results = {}
+        for engine in timings:
+            start = time.perf_counter()
+            results[engine] = identify_areas(screen_areas, engine=engine)
+            timings[engine].append(time.perf_counter() - start)
+        mismatched_winners += sum(a[0] != b[0] for a, b in zip(results["template"], results["batched"]))
+
+        expected = np.array([[compare_images(area, reference_images[name]) for name in names] for area in screen_areas])
+        max_difference = max(max_difference, float(np.abs(expected - reference_bank.score_slots(screen_areas)).max()))
+
+    print(f"{len(reference_bank)} templates x {len(AREAS)} areas, {ticks} ticks")
+    for engine, values in timings.items():
+        values = np.array(values) * 1000
+        print(f"  {engine:>8}: median {np.median(values):7.2f} ms/tick, max {values.max():7.2f} ms/tick")
+    speedup = np.median(timings["template"]) / np.median(timings["batched"])
+    print(f"  speedup: {speedup:.1f}x")
+    print(f"  max score difference: {max_difference:.2e}")
+    print(f"  slots with a different winner: {mismatched_winners}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
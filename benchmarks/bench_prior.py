@@ -0,0 +1,110 @@
+"""Compare prior-ordered early-exit matching with the coarse engine on lobbies with a skewed pick history.
+
+Agents get Zipf-like pick rates; the prior engine is told their order (as the analytics
+store would) and every lobby draws its hovers and locks from the same rates. Both
+engines scan the same frames side by side. Reports the comparisons the prior engine
+needed per matched area, the matching time per scan, how often the two engines'
+current matches disagreed and how many slots ended up locked to the wrong agent.
+
+The match tuning comes from MATCH_TUNING_PATH when match_tuning.py has been run,
+otherwise it is derived here.
+
+Run from the repository root: python -m benchmarks.bench_prior [--lobbies 10] [--skew 1.2]
+"""
+import argparse
+import time
+import numpy as np
+from config import AREAS
+from match_tuning import confusion_matrix, derive_tuning
+from matcher import load_tuning, reference_identity
+from scanner import ScanSession, load_references, build_prior_matcher
+from benchmarks.eval_slot_tracking import render_lobby
+
+ENGINES = ("coarse", "prior")
+
+
+def make_lobby(rng, agents, weights):
+    """Like eval_slot_tracking.make_lobby, with agents drawn by pick rate."""
+    events = []
+    for _ in AREAS:
+        t = rng.uniform(0.5, 10)
+        area_events = []
+        for _ in range(rng.integers(1, 4)):
+            agent = agents[rng.choice(len(agents), p=weights)]
+            area_events.append((t, "selected_" + agent.replace(".png", "_blue.png")))
+            t += rng.uniform(1.0, 8)
+        area_events.append((t, agent))
+        events.append(area_events)
+    return max(area_events[-1][0] for area_events in events) + 3, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prior-ordered early-exit matching vs the coarse engine.")
+    parser.add_argument("--lobbies", type=int, default=10)
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf exponent of the pick rates")
+    parser.add_argument("--interval", type=float, default=0.15, help="seconds between scans")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    references = load_references()
+    tuning = load_tuning()
+    if not tuning:
+        bank = references.reference_bank
+        labels, scores = confusion_matrix(references.reference_images, bank, references.shape)
+        tuning = {name: (entry["threshold"], entry["decisive"])
+                  for name, entry in derive_tuning(bank.names, labels, scores).items()}
+        print("No saved match tuning; derived it from the reference images")
+
+    rng = np.random.default_rng(args.seed)
+    # Only agents with a selected-state image can be hovered in the simulation
+    agents = sorted(name for name in references.reference_images if not name.startswith("selected_")
+                    and "selected_" + name.replace(".png", "_blue.png") in references.reference_images)
+    agents = list(rng.permutation(agents))
+    weights = 1.0 / np.arange(1, len(agents) + 1) ** args.skew
+    weights /= weights.sum()
+    matcher = build_prior_matcher(references.reference_images, tuning,
+                                  list(dict.fromkeys(reference_identity(name)[0] for name in agents)))
+    references.prior_matcher = matcher
+
+    timings = {engine: [] for engine in ENGINES}
+    mislocks = {engine: 0 for engine in ENGINES}
+    disagreements = 0
+    matched_ticks = 0
+    for _ in range(args.lobbies):
+        end, events = make_lobby(rng, agents, weights)
+        sessions = {engine: ScanSession(areas=AREAS, engine=engine) for engine in ENGINES}
+        for session in sessions.values():
+            session.start_screen_confirmed = True  # The lobbies start at the agent select screen
+        for _, frame in render_lobby(rng, references.reference_images, events, end, args.interval, 6.0, 0.0, agents):
+            for engine, session in sessions.items():
+                start = time.perf_counter()
+                session.scan(0.0, frame)
+                timings[engine].append(time.perf_counter() - start)
+            current = [[reference_identity(name) if name else None for name, _ in session.last_matches]
+                       for session in sessions.values()]
+            disagreements += sum(a != b for a, b in zip(*current))
+            matched_ticks += 1
+        for engine, session in sessions.items():
+            mislocks[engine] += sum(locked != area_events[-1][1]
+                                    for locked, area_events in zip(session.locked_agents, events))
+
+    counts = matcher.comparison_counts
+    matched = sum(counts.values())
+    print(f"{args.lobbies} lobbies, {len(agents)} agents with Zipf({args.skew}) pick rates, "
+          f"{len(references.reference_images)} references")
+    comparisons = sum(n * c for n, c in counts.items())
+    print(f"  prior engine: {matched} changed areas matched, {comparisons / max(matched, 1):.2f} comparisons each "
+          f"on average, {comparisons / (matched_ticks * len(AREAS)):.3f} per area per scan")
+    for label, low, high in (("1", 1, 1), ("2", 2, 2), ("3-5", 3, 5), ("6+", 6, 10 ** 6)):
+        share = sum(c for n, c in counts.items() if low <= n <= high) / max(matched, 1)
+        print(f"    {label:>4} comparisons: {share * 100:5.1f}% of areas")
+    for engine in ENGINES:
+        values = np.array(timings[engine]) * 1000
+        busy = values[values > 0.5]  # Ticks where some area changed and was matched
+        print(f"  {engine:>6}: scan tick mean {values.mean():5.2f} ms, ticks that matched median "
+              f"{np.median(busy) if busy.size else 0:5.2f} ms, {mislocks[engine]} wrong or missing locks")
+    print(f"  area matches that differed between the engines: {disagreements} of {matched_ticks * len(AREAS)}")
+
+
+if __name__ == "__main__":
+    main()
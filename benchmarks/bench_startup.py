@@ -0,0 +1,96 @@
+"""Measure cold start: importing the headless scanner core, getting it ready to match, and importing main.py.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in sys.modules,
+and is repeated to take the median. Also lists the heavy optional modules (GUI
+toolkits, capture backends, plotting, dataframes) that each import pulls in; the
+headless core should pull in none of them.
+
+Run from the repository root: python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+
+HEAVY_MODULES = ("tkinter", "customtkinter", "PIL", "matplotlib", "pandas", "seaborn", "pyautogui", "mss")
+
+# Each snippet prints a JSON dict of {step: seconds} plus the heavy modules it loaded
+SNIPPETS = {
+    "headless core": """
+import time
+start = time.perf_counter()
+import scanner, scan_worker, replay
+steps = {"import": time.perf_counter() - start}
+""",
+    "core ready to match": """
+import time
+start = time.perf_counter()
+import scanner
+steps = {"import": time.perf_counter() - start}
+start = time.perf_counter()
+references = scanner.load_references()
+steps["load references"] = time.perf_counter() - start
+start = time.perf_counter()
+import numpy as np
+scanner.identify_areas([np.zeros(scanner.area_shape(scanner.default_session.areas) + (3,), np.uint8)] * 5)
+steps["first match"] = time.perf_counter() - start
+""",
+    "GUI modules (no Tk)": """
+import time
+start = time.perf_counter()
+import scan_worker, asset_cache, export, session_log, analytics_charts, previews, telemetry
+steps = {"import": time.perf_counter() - start}
+""",
+    "main.py": """
+import time
+start = time.perf_counter()
+import main
+steps = {"import": time.perf_counter() - start}
+""",
+}
+
+REPORT = """
+import json, sys
+print(json.dumps({"steps": steps, "heavy": sorted({name.split(".")[0] for name in sys.modules} & set(%r))}))
+""" % (HEAVY_MODULES,)
+
+
+def run(snippet):
+    """Run a snippet in a fresh interpreter; returns (wall seconds, report dict) or (None, error text)."""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", snippet + REPORT], capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        return None, process.stderr.strip().splitlines()[-1]
+    return wall, json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start times of the scanner core and main.py.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, snippet in SNIPPETS.items():
+        walls = []
+        steps = {}
+        heavy = []
+        for _ in range(args.runs):
+            wall, report = run(snippet)
+            if wall is None:
+                break
+            walls.append(wall)
+            heavy = report["heavy"]
+            for step, seconds in report["steps"].items():
+                steps.setdefault(step, []).append(seconds)
+        if not walls:
+            print(f"{name:>20}: could not start ({report})")
+            continue
+        details = ", ".join(f"{step} {np.median(values) * 1000:.0f} ms" for step, values in steps.items())
+        print(f"{name:>20}: process {np.median(walls) * 1000:5.0f} ms ({details}); "
+              f"heavy modules: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
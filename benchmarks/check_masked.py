@@ -0,0 +1,59 @@
+"""Check that masked greyscale matching names the right agent and state, and time it against the colour engines.
+
+Every bundled reference image from agent_images/ and agent_images_selected/ is pasted
+into an area of a synthetic frame with background noise, alongside some empty areas.
+The masked engine only has the agent_images/ portraits, so a pasted selected image
+counts as correct when it comes back as "selected_" plus the same agent.
+
+Run from the repository root: python -m benchmarks.check_masked [rounds]  (default 5: 325 areas)
+"""
+import os
+import sys
+import time
+import numpy as np
+from config import AREAS, AGENT_ALIASES
+from scanner import reference_images, reference_bank, portrait_matcher, identify_areas
+from benchmarks.synthetic import make_frame
+
+
+def agent_and_state(name):
+    """("jett", "selected") for "selected_jett_blue.png", (None, None) for no match."""
+    if name is None:
+        return None, None
+    state = "selected" if name.startswith("selected_") else "locked"
+    stem = os.path.splitext(name.replace("selected_", ""))[0].split("_")[0]
+    return AGENT_ALIASES.get(stem, stem), state
+
+
+def main(rounds=5):
+    rng = np.random.default_rng(0)
+    names = list(reference_images)
+    screen_areas = []
+    expected = []
+    for _ in range(rounds):
+        order = list(rng.permutation(names)) + [None] * len(AREAS)
+        for start in range(0, len(order), len(AREAS)):
+            slots = (order[start:start + len(AREAS)] + [None] * len(AREAS))[:len(AREAS)]
+            screen_areas.extend(make_frame(rng, reference_images, slots, noise=6.0).crop_areas(AREAS))
+            expected.extend(agent_and_state(name) for name in slots)
+
+    results = {}
+    timings = {}
+    for engine in ("template", "coarse", "masked"):
+        start = time.perf_counter()
+        results[engine] = identify_areas(screen_areas, engine=engine)
+        timings[engine] = (time.perf_counter() - start) / len(screen_areas) * len(AREAS) * 1000
+
+    print(f"{len(screen_areas)} areas; colour engines use {len(reference_bank)} templates, "
+          f"masked uses {len(portrait_matcher)}")
+    for engine, value in timings.items():
+        print(f"  {engine:>8}: {value:7.2f} ms per five areas")
+    errors = [(truth, match) for truth, match in zip(expected, results["masked"]) if agent_and_state(match[0]) != truth]
+    print(f"  masked agent or state wrong: {len(errors)}")
+    for truth, (name, score) in errors:
+        print(f"    expected {truth[0]} ({truth[1]}), got {name} ({score:.3f})")
+    return len(errors)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 5) else 0)
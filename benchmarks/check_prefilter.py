@@ -0,0 +1,46 @@
+"""Check that coarse-to-fine matching picks the same winners as the brute-force matcher.
+
+Every bundled reference image from agent_images/ and agent_images_selected/ is pasted
+into an area of a synthetic frame with background noise, alongside some empty areas,
+and identified with both engines.
+
+Run from the repository root: python -m benchmarks.check_prefilter [rounds]
+"""
+import sys
+import time
+import numpy as np
+from config import AREAS, PREFILTER_CANDIDATES, PREFILTER_SCALE
+from scanner import reference_images, identify_areas
+from benchmarks.synthetic import make_frame
+
+
+def main(rounds=3):
+    rng = np.random.default_rng(0)
+    names = list(reference_images)
+    screen_areas = []
+    for _ in range(rounds):
+        order = list(rng.permutation(names)) + [None] * len(AREAS)
+        for start in range(0, len(order), len(AREAS)):
+            slots = (order[start:start + len(AREAS)] + [None] * len(AREAS))[:len(AREAS)]
+            screen_areas.extend(make_frame(rng, reference_images, slots, noise=6.0).crop_areas(AREAS))
+
+    results = {}
+    timings = {}
+    for engine in ("template", "coarse"):
+        start = time.perf_counter()
+        results[engine] = identify_areas(screen_areas, engine=engine)
+        timings[engine] = (time.perf_counter() - start) / len(screen_areas) * len(AREAS) * 1000
+
+    mismatches = [(expected, actual) for expected, actual in zip(results["template"], results["coarse"])
+                  if expected[0] != actual[0]]
+    print(f"{len(screen_areas)} areas, scale {PREFILTER_SCALE}, {PREFILTER_CANDIDATES} candidates per area")
+    for engine, value in timings.items():
+        print(f"  {engine:>8}: {value:7.2f} ms per five areas")
+    print(f"  different winners: {len(mismatches)}")
+    for expected, actual in mismatches:
+        print(f"    brute force {expected[0]} ({expected[1]:.3f}) vs coarse {actual[0]} ({actual[1]:.3f})")
+    return len(mismatches)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 3) else 0)
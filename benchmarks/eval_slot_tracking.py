@@ -0,0 +1,142 @@
+"""Compare legacy slot tracking with N-of-M voting on a corpus of noisy synthetic lobbies.
+
+Each lobby has every slot hover one or more agents and then lock one, scanned at a
+fixed interval. On top of the frame noise, slots occasionally show a single-frame
+glitch (another agent's locked portrait, as during UI animations or a stream hiccup)
+and every transition is one crossfaded frame. Both modes scan the same frames; the
+report counts mislocked slots (locked to the wrong agent at the end), wrong lock
+events (any lock naming the wrong agent, even if corrected later), missed locks and
+how far the recorded lock times are from the true ones.
+
+Run from the repository root: python -m benchmarks.eval_slot_tracking [--lobbies 20] [--glitch 0.01]
+"""
+import argparse
+import numpy as np
+from config import AREAS
+from scanner import ScanSession, load_references
+from benchmarks.synthetic import make_frame, paste
+from capture import capture_region
+
+MODES = ("legacy", "voting")
+
+
+def make_lobby(rng, agents):
+    """Return (end time, per-area list of (time, reference name) events); the last event locks."""
+    events = []
+    for _ in AREAS:
+        t = rng.uniform(0.5, 10)
+        area_events = []
+        for _ in range(rng.integers(1, 4)):
+            agent = agents[rng.integers(len(agents))]
+            area_events.append((t, "selected_" + agent.replace(".png", "_blue.png")))
+            t += rng.uniform(1.0, 8)
+        area_events.append((t, agent))
+        events.append(area_events)
+    return max(area_events[-1][0] for area_events in events) + 3, events
+
+
+def slot_at(t, area_events):
+    """Return (current reference name, previous one, time of the last change) at time t."""
+    current = previous = None
+    changed_at = -np.inf
+    for event_time, name in area_events:
+        if event_time <= t:
+            previous, current, changed_at = current, name, event_time
+    return current, previous, changed_at
+
+
+def slot_picture(area, picture):
+    """picture on an empty slot-sized background, clipped like synthetic.paste does."""
+    _, _, width, height = area
+    canvas = np.full((height, width, 3), 40.0, dtype=np.float32)
+    h, w = min(picture.shape[0], height), min(picture.shape[1], width)
+    canvas[:h, :w] = picture[:h, :w]
+    return canvas
+
+
+def render_lobby(rng, references, events, end, interval, noise, glitch_rate, agents):
+    """Yield (timestamp, Frame) for one lobby, with glitches and crossfades applied per slot."""
+    left, top, _, _ = capture_region()
+    t = 0.0
+    while t < end:
+        names = []
+        overlays = []
+        for area, area_events in zip(AREAS, events):
+            current, previous, changed_at = slot_at(t, area_events)
+            if current is not None and rng.random() < glitch_rate:
+                # One frame of some other agent's locked portrait
+                overlays.append((area, slot_picture(area, references[agents[rng.integers(len(agents))]])))
+                names.append(None)
+            elif current is not None and t - changed_at < interval:
+                # First frame after a change: halfway between the old and new picture
+                new = slot_picture(area, references[current])
+                old = slot_picture(area, references[previous]) if previous in references else np.full_like(new, 40.0)
+                overlays.append((area, (old + new) / 2))
+                names.append(None)
+            else:
+                names.append(current if current in references else None)
+        frame = make_frame(rng, references, names, noise=0, timestamp=t)
+        image = frame.image
+        for area, picture in overlays:
+            paste(image, area, picture.astype(np.uint8), left, top)
+        if noise:
+            noisy = image.astype(np.float32) + rng.normal(0, noise, image.shape).astype(np.float32)
+            image[:] = np.clip(noisy, 0, 255).astype(np.uint8)
+        yield t, frame
+        t += interval
+
+
+def evaluate(frames, events, mode):
+    """Scan the frames with one tracking mode; returns per-slot (locked agent, lock time, wrong lock events)."""
+    session = ScanSession(areas=AREAS, record_events=True, tracking=mode)
+    session.start_screen_confirmed = True  # The corpus starts at the agent select screen
+    for _, frame in frames:
+        session.scan(0.0, frame)
+    wrong = [0] * len(AREAS)
+    for event, i, agent, _, _ in session.events:
+        if event == "lock" and agent != events[i][-1][1]:
+            wrong[i] += 1
+    return [(session.locked_agents[i], session.confirmation_times[i], wrong[i]) for i in range(len(AREAS))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mislocks of legacy vs voting slot tracking on synthetic lobbies.")
+    parser.add_argument("--lobbies", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.15, help="seconds between scans")
+    parser.add_argument("--noise", type=float, default=6.0, help="standard deviation of the pixel noise")
+    parser.add_argument("--glitch", type=float, default=0.01, help="chance per slot and frame of a glitch frame")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    references = load_references().reference_images
+    agents = sorted(name for name in references if not name.startswith("selected_"))
+    rng = np.random.default_rng(args.seed)
+    totals = {mode: {"slots": 0, "mislocks": 0, "wrong": 0, "missed": 0, "errors": []} for mode in MODES}
+    for _ in range(args.lobbies):
+        end, events = make_lobby(rng, agents)
+        frames = list(render_lobby(rng, references, events, end, args.interval, args.noise, args.glitch, agents))
+        for mode in MODES:
+            total = totals[mode]
+            for (locked, lock_time, wrong), area_events in zip(evaluate(frames, events, mode), events):
+                true_time, true_agent = area_events[-1]
+                total["slots"] += 1
+                total["wrong"] += wrong
+                if locked is None:
+                    total["missed"] += 1
+                elif locked != true_agent:
+                    total["mislocks"] += 1
+                else:
+                    total["errors"].append(abs(lock_time - true_time))
+
+    print(f"{args.lobbies} lobbies, scans every {args.interval * 1000:.0f} ms, noise {args.noise}, "
+          f"glitch rate {args.glitch}")
+    for mode in MODES:
+        total = totals[mode]
+        errors = np.array(total["errors"]) if total["errors"] else np.zeros(1)
+        print(f"  {mode:>7}: {total['mislocks']:3d} mislocked / {total['slots']} slots, "
+              f"{total['wrong']:3d} wrong lock events, {total['missed']:3d} missed, "
+              f"lock time error mean {errors.mean() * 1000:5.1f} ms / max {errors.max() * 1000:5.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare the adaptive scan scheduler with the old fixed 150 ms / 500 ms timers on a simulated lobby.
+
+A synthetic agent select (menus, then players hovering, switching and locking, then a
+long wait after everyone locked) is rendered at each tick's simulated time and run
+through a real ScanSession. The baseline records events at the frame that saw them, as
+before; the adaptive run uses midpoint event times. Reports the number of ticks, the CPU time spent in them, and
+how late the recorded selection/confirmation times are compared with the true events.
+
+Run from the repository root: python -m benchmarks.sim_scheduler [seed]
+"""
+import sys
+import time
+import numpy as np
+from config import AREAS
+import scanner
+from scanner import ScanSession, load_references
+from scheduler import AdaptiveScheduler
+from benchmarks.synthetic import make_frame
+
+
+class FixedScheduler:
+    """The original cadence: starting screen every 500 ms, agents every 150 ms."""
+
+    skipped_ticks = 0
+
+    def next_deadline(self, deadline, session, started, now):
+        return max(deadline + (0.15 if started else 0.5), now)
+
+
+def make_timeline(rng, references):
+    """Return (start screen time, end time, per-area list of (time, reference name) events)."""
+    agents = sorted({name for name in references if not name.startswith("selected_")})
+    start_screen = rng.uniform(5, 15)
+    events = []
+    for _ in AREAS:
+        t = start_screen + rng.uniform(0.5, 20)
+        area_events = []
+        for _ in range(rng.integers(1, 4)):  # Hover one or more agents before locking
+            agent = agents[rng.integers(len(agents))]
+            area_events.append((t, "selected_" + agent.replace(".png", "_blue.png")))
+            t += rng.uniform(1.5, 15)
+        area_events.append((t, agent))
+        events.append(area_events)
+    end = max(area_events[-1][0] for area_events in events) + 30
+    return start_screen, end, events
+
+
+def state_at(t, events, references):
+    slots = []
+    for area_events in events:
+        current = None
+        for event_time, name in area_events:
+            if event_time <= t and name in references:
+                current = name
+        slots.append(current)
+    return slots
+
+
+def simulate(scheduler, start_screen, end, events, references, start_reference, seed):
+    rng = np.random.default_rng(seed)
+    session = ScanSession()
+    start_time = None
+    ticks = 0
+    busy = 0.0
+    deadline = 0.0
+    results = []
+    while deadline < end:
+        now = deadline
+        slots = state_at(now, events, references) if now >= start_screen else [None] * len(AREAS)
+        frame = make_frame(rng, references, slots, start_reference if start_screen <= now < start_screen + 3 else None,
+                           timestamp=now)
+        started = time.perf_counter()
+        if start_time is None:
+            if session.check_start_screen(frame):
+                start_time = now
+        else:
+            results = session.scan(start_time, frame) or results
+        cost = time.perf_counter() - started
+        busy += cost
+        ticks += 1
+        deadline = scheduler.next_deadline(deadline, session, start_time is not None, now + cost)
+    return ticks, busy, start_time, results
+
+
+def timing_errors(start_time, results, events, references):
+    """Seconds between each true first-hover / lock event and the time the scanner recorded."""
+    errors = []
+    for (_, _, _, sel_time, conf_time), area_events in zip(results, events):
+        hovers = [t for t, name in area_events if name.startswith("selected_") and name in references]
+        if sel_time is not None and hovers:
+            errors.append(start_time + sel_time - hovers[-1])
+        if conf_time is not None:
+            errors.append(start_time + conf_time - area_events[-1][0])
+    return np.abs(errors)
+
+
+def main(seed=0):
+    references = load_references()
+    rng = np.random.default_rng(seed)
+    start_screen, end, events = make_timeline(rng, references.reference_images)
+    print(f"Simulated lobby: starting screen at {start_screen:.1f} s, {end:.1f} s total")
+    for name, scheduler, midpoint in (("fixed 150/500 ms", FixedScheduler(), False),
+                                      ("adaptive", AdaptiveScheduler(), True)):
+        # The fixed baseline records events at the frame that saw them, as before
+        scanner.EVENT_TIME_MIDPOINT = midpoint
+        ticks, busy, start_time, results = simulate(scheduler, start_screen, end, events, references.reference_images,
+                                                    references.start_reference, seed)
+        errors = timing_errors(start_time, results, events, references.reference_images)
+        print(f"  {name:>16}: {ticks:4d} ticks, {busy * 1000:7.1f} ms scanning, "
+              f"timing error mean {errors.mean() * 1000:5.1f} ms / max {errors.max() * 1000:5.1f} ms "
+              f"({len(errors)} events)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
@@ -0,0 +1,189 @@
+"""Soak test: replay synthetic lobbies through the scanner and the render path for a long time and watch memory.
+
+A few noisy lobbies are rendered once and then replayed back to back, with timestamps
+running on, through scan_and_identify_agents and the GUI's render path. Every frame
+is "captured" the way a live source does it: copied into a FramePool buffer, or into
+a new array with --pool 0. The last few frames are kept alive as the snapshot queue
+and the GUI would. Without --gui the render path is the headless part of the GUI
+(PreviewBuffers plus the table text); with --gui it is ValorantScannerGUI itself,
+including reset_gui between lobbies (needs customtkinter and a display).
+
+Every --sample seconds it reports the process RSS, the number of memory blocks the
+interpreter holds (sys.getallocatedblocks), generation-0 garbage collections since
+the previous sample (a proxy for the object allocation rate) and, with --trace, the
+bytes tracemalloc sees held and at peak during the sample. At the end it fits the
+growth per hour after the first pass over the lobbies (the warm-up).
+
+Scans run back to back, so an hour of soak covers several hours of real scanning.
+
+Run from the repository root: python -m benchmarks.soak [--minutes 5] [--pool 0] [--gui] [--trace]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+import numpy as np
+from config import AREAS, AGENT_ROLES, SNAPSHOT_QUEUE_SIZE, FRAME_POOL_SIZE
+from capture import Frame, FramePool, capture_region
+from previews import PreviewBuffers
+import scanner
+from scanner import load_references, reset_scanner_state, scan_and_identify_agents
+from benchmarks.eval_slot_tracking import make_lobby, render_lobby
+
+
+def rss_mb():
+    """Resident set size of this process in MiB, or None if it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class HeadlessRenderer:
+    """The GUI's per-snapshot work without Tk: area previews and the table row text."""
+
+    def __init__(self):
+        self.previews = PreviewBuffers(len(AREAS))
+        self.rows = []
+
+    def reset(self):
+        self.previews.reset()
+
+    def render(self, start_time, results, frame):
+        for i, area in enumerate(AREAS):
+            self.previews.update(i, frame.crop(*area))
+        self.rows = [(f"Area {area_num}", AGENT_ROLES.get(agent_name.lower(), "Unknown"), f"{score:.2f}",
+                      f"{sel_time:.2f} sec" if sel_time is not None else "Not selected",
+                      f"{conf_time:.2f} sec" if conf_time is not None else "Not confirmed")
+                     for area_num, agent_name, score, sel_time, conf_time in results]
+
+
+class GuiRenderer:
+    """Render snapshots with the real ValorantScannerGUI on a Tk root."""
+
+    def __init__(self):
+        import customtkinter as ctk
+        from gui import ValorantScannerGUI
+        from scan_worker import ScanSnapshot
+        self.snapshot = ScanSnapshot
+        self.root = ctk.CTk()
+        self.gui = ValorantScannerGUI(self.root)
+        self.gui.scan_session.areas = list(AREAS)  # The synthetic frames use the default layout
+
+    def reset(self):
+        self.gui.reset_gui()
+        self.gui.start_time = None
+        self.root.update()
+
+    def render(self, start_time, results, frame):
+        self.gui.render_snapshot(self.snapshot(frame.timestamp, start_time, 1.0, tuple(results), frame, None))
+        self.root.update()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory growth over a long run of synthetic lobbies.")
+    parser.add_argument("--minutes", type=float, default=5.0, help="how long to run")
+    parser.add_argument("--sample", type=float, default=10.0, help="seconds between samples")
+    parser.add_argument("--lobbies", type=int, default=3, help="distinct lobbies to replay")
+    parser.add_argument("--pool", type=int, default=FRAME_POOL_SIZE, help="capture buffers (0: a new array per frame)")
+    parser.add_argument("--interval", type=float, default=0.15, help="seconds between scans in the lobbies")
+    parser.add_argument("--gui", action="store_true", help="render with the real GUI")
+    parser.add_argument("--trace", action="store_true", help="also track Python/NumPy allocations with tracemalloc")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    references = load_references().reference_images
+    agents = sorted(name for name in references if not name.startswith("selected_")
+                    and "selected_" + name.replace(".png", "_blue.png") in references)
+    rng = np.random.default_rng(args.seed)
+    lobbies = []
+    for _ in range(args.lobbies):
+        end, events = make_lobby(rng, agents)
+        frames = [(t, frame.image) for t, frame in render_lobby(rng, references, events, end, args.interval,
+                                                                 6.0, 0.0, agents)]
+        lobbies.append((end, frames))
+    left, top, width, height = capture_region()
+    pool = FramePool(args.pool) if args.pool else None
+    renderer = GuiRenderer() if args.gui else HeadlessRenderer()
+    scanner.default_session.areas = list(AREAS)
+    held = deque(maxlen=SNAPSHOT_QUEUE_SIZE + 1)  # Frames still referenced by the snapshot queue and the GUI
+
+    if args.trace:
+        tracemalloc.start()
+    samples = []  # (seconds, ticks, lobbies, RSS MiB, blocks, gen-0 collections, traced MiB, peak MiB)
+    start = time.perf_counter()
+    next_sample = start
+    collections = gc.get_stats()[0]["collections"]
+    ticks = played = 0
+    offset = 0.0
+    warm_ticks = None
+    corpus = sum(image.nbytes for _, frames in lobbies for _, image in frames) / 2 ** 20
+    print(f"{args.lobbies} lobbies, {sum(len(frames) for _, frames in lobbies)} frames of {width}x{height} "
+          f"({corpus:.0f} MiB of the RSS), "
+          f"{'pooled capture (' + str(args.pool) + ' buffers)' if pool else 'a new frame per capture'}, "
+          f"{'GUI' if args.gui else 'headless'} rendering")
+    print(f"{'minutes':>8}{'scans':>9}{'RSS MiB':>9}{'blocks':>9}{'gen0 gc':>9}"
+          + (f"{'traced MiB':>12}{'peak MiB':>10}" if args.trace else ""))
+    while time.perf_counter() - start < args.minutes * 60:
+        end, frames = lobbies[played % len(lobbies)]
+        reset_scanner_state()
+        scanner.default_session.start_screen_confirmed = True  # The lobbies start at the agent select screen
+        renderer.reset()
+        for t, image in frames:
+            if pool is not None:
+                captured = pool.take(height, width)
+                np.copyto(captured, image)
+            else:
+                captured = image.copy()
+            frame = Frame(captured, left, top, offset + t)
+            held.append(frame)
+            results = scan_and_identify_agents(offset, frame)
+            renderer.render(offset, results, frame)
+            ticks += 1
+            now = time.perf_counter()
+            if now >= next_sample:
+                next_sample = now + args.sample
+                total = gc.get_stats()[0]["collections"]
+                traced, peak = tracemalloc.get_traced_memory() if args.trace else (0, 0)
+                if args.trace:
+                    tracemalloc.reset_peak()
+                rss = rss_mb()
+                samples.append((now - start, ticks, played, np.nan if rss is None else rss, sys.getallocatedblocks(),
+                                total - collections, traced / 2 ** 20, peak / 2 ** 20))
+                collections = total
+                sample = samples[-1]
+                print(f"{sample[0] / 60:8.1f}{ticks:9d}{sample[3]:9.1f}{sample[4]:9d}{sample[5]:9d}"
+                      + (f"{sample[6]:12.2f}{sample[7]:10.2f}" if args.trace else ""))
+        offset += end
+        played += 1
+        if played == len(lobbies):
+            warm_ticks = ticks
+
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} scans of {played} lobbies in {elapsed / 60:.1f} min ({ticks / elapsed:.0f} scans/s, "
+          f"{offset / 3600:.1f} h of lobby time)")
+    warm = np.array([sample for sample in samples if warm_ticks is not None and sample[1] > warm_ticks])
+    if len(warm) < 2:
+        print("Too few samples after the warm-up pass for a trend; run longer")
+        return
+    hours = warm[:, 0] / 3600
+    for label, column, unit in (("RSS", 3, "MiB"), ("blocks", 4, "blocks"), ("traced", 6, "MiB")):
+        values = warm[:, column]
+        if column == 6 and not args.trace or np.isnan(values).any():
+            continue
+        slope = np.polyfit(hours, values, 1)[0] if np.ptp(hours) > 0 else 0.0
+        print(f"  {label:>6}: {values[0]:.1f} -> {values[-1]:.1f} {unit} after warm-up, "
+              f"trend {slope:+.1f} {unit}/hour (min {values.min():.1f}, max {values.max():.1f})")
+
+
+if __name__ == "__main__":
+    main()
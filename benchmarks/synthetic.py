@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+from capture import Frame, capture_region
+from config import AREAS, START_AREA
+
+
+def paste(image, region, picture, left, top):
+    """Paste picture into image at the screen-space top-left corner of region, clipped to the region."""
+    x, y, width, height = region
+    h = min(picture.shape[0], height)
+    w = min(picture.shape[1], width)
+    image[y - top:y - top + h, x - left:x - left + w] = picture[:h, :w]
+
+
+def make_frame(rng, reference_images, slot_agents, start_reference=None, noise=4.0, timestamp=0.0):
+    """Build a Frame of the capture region with the given reference image names pasted into the slots.
+
+    Slots whose name is None get a random background; start_reference, when given,
+    is pasted into START_AREA. Gaussian noise keeps the matches from being exact.
+    """
+    left, top, width, height = capture_region()
+    image = rng.integers(20, 60, (height, width, 3), dtype=np.uint8)
+    image = cv2.GaussianBlur(image, (7, 7), 0)
+    if start_reference is not None:
+        paste(image, START_AREA, start_reference, left, top)
+    for area, agent_name in zip(AREAS, slot_agents):
+        if agent_name is not None:
+            paste(image, area, reference_images[agent_name], left, top)
+    if noise:
+        noisy = image.astype(np.float32) + rng.normal(0, noise, image.shape).astype(np.float32)
+        image = np.clip(noisy, 0, 255).astype(np.uint8)
+    return Frame(image, left, top, timestamp)
+
+
+def random_slots(rng, reference_images, empty_rate=0.2):
+    """Pick a random reference image name (or None) for each slot."""
+    names = list(reference_images)
+    return [None if rng.random() < empty_rate else names[rng.integers(len(names))] for _ in AREAS]
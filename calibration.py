@@ -0,0 +1,192 @@
+"""Screen geometry for resolutions other than the 1080p layout in config.py.
+
+AREAS, START_AREA, MAX_WIDTH and MAX_HEIGHT describe a 1920x1080 screen. A Layout maps
+them onto another resolution with one uniform scale plus an offset. For a new
+resolution the layout is first estimated (the game UI scales with the screen height
+and is centred horizontally), then calibrated once by finding the starting screen
+element in a full screenshot with a multi-scale template search. Calibrated layouts
+are cached per resolution in CALIBRATION_PATH, so later runs go straight to the fixed
+capture regions.
+
+Calibrate offline from a screenshot of the starting screen with:
+    python calibration.py SCREENSHOT [--show]
+"""
+import argparse
+import json
+import os
+from collections import namedtuple
+import cv2
+import numpy as np
+from config import AREAS, START_AREA, BASE_RESOLUTION, CALIBRATION_PATH, CALIBRATION_SCALE_RANGE, START_THRESHOLD
+
+# resolution and offset are (x, y) pairs; areas and start_area are (x, y, width, height) boxes
+Layout = namedtuple('Layout', ['resolution', 'scale', 'offset', 'areas', 'start_area', 'calibrated'])
+
+# Layout in use; the 1080p one until use_layout() is called
+_active = None
+
+
+def _scale_box(box, scale, offset):
+    x, y, width, height = box
+    return (int(round(x * scale + offset[0])), int(round(y * scale + offset[1])),
+            int(round(width * scale)), int(round(height * scale)))
+
+
+def make_layout(resolution, scale, offset=(0.0, 0.0), calibrated=False):
+    """Map the 1080p boxes from config.py onto a screen of the given resolution."""
+    return Layout(tuple(resolution), float(scale), (float(offset[0]), float(offset[1])),
+                  [_scale_box(area, scale, offset) for area in AREAS], _scale_box(START_AREA, scale, offset),
+                  calibrated)
+
+
+def base_layout():
+    return make_layout(BASE_RESOLUTION, 1.0, calibrated=True)
+
+
+def estimate_layout(resolution):
+    """Guess the layout for a resolution: scale with the screen height, centre horizontally."""
+    width, height = resolution
+    scale = height / BASE_RESOLUTION[1]
+    return make_layout(resolution, scale, ((width - BASE_RESOLUTION[0] * scale) / 2, 0.0),
+                       calibrated=tuple(resolution) == tuple(BASE_RESOLUTION))
+
+
+def active_layout():
+    return _active if _active is not None else base_layout()
+
+
+def use_layout(layout):
+    global _active
+    _active = layout
+
+
+def load_calibrations(path=CALIBRATION_PATH):
+    """Return {"WIDTHxHEIGHT": Layout} from the calibration cache."""
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {key: Layout(tuple(entry['resolution']), entry['scale'], tuple(entry['offset']),
+                        [tuple(area) for area in entry['areas']], tuple(entry['start_area']), True)
+            for key, entry in entries.items()}
+
+
+def save_layout(layout, path=CALIBRATION_PATH):
+    """Store a calibrated layout in the cache, replacing any earlier one for its resolution."""
+    layouts = load_calibrations(path)
+    layouts[_resolution_key(layout.resolution)] = layout
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({key: {field: value for field, value in entry._asdict().items() if field != 'calibrated'}
+                   for key, entry in layouts.items()}, f, indent=2)
+
+
+def layout_for(resolution, path=CALIBRATION_PATH):
+    """Return the cached calibration for resolution, or an uncalibrated estimate."""
+    if resolution is None:
+        return base_layout()
+    cached = load_calibrations(path).get(_resolution_key(resolution))
+    return cached if cached is not None else estimate_layout(resolution)
+
+
+def _resolution_key(resolution):
+    return f"{resolution[0]}x{resolution[1]}"
+
+
+def locate_start_element(screenshot, start_image, scales, coarse=0.5):
+    """Find start_image (at 1080p size) in a full BGR screenshot, trying each scale.
+
+    Returns (score, scale, (x, y)) of the best match's top-left corner. The search runs
+    on a downscaled screenshot first; the best scale is then refined at full size in a
+    small window around the coarse hit.
+    """
+    small_screen = cv2.resize(screenshot, None, fx=coarse, fy=coarse, interpolation=cv2.INTER_AREA)
+    best = (-1.0, None, None)
+    for scale in scales:
+        template = cv2.resize(start_image, None, fx=scale * coarse, fy=scale * coarse, interpolation=cv2.INTER_AREA)
+        if template.shape[0] > small_screen.shape[0] or template.shape[1] > small_screen.shape[1]:
+            continue
+        _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(small_screen, template, cv2.TM_CCOEFF_NORMED))
+        if score > best[0]:
+            best = (score, scale, (location[0] / coarse, location[1] / coarse))
+    if best[1] is None:
+        return best
+
+    _, coarse_scale, (x, y) = best
+    step = (scales[1] - scales[0]) / 2 if len(scales) > 1 else 0.0
+    margin = int(4 / coarse) + 2
+    refined = (-1.0, None, None)  # Full-size scores are not comparable with the coarse ones
+    for scale in (coarse_scale - step, coarse_scale, coarse_scale + step):
+        template = cv2.resize(start_image, None, fx=scale, fy=scale,
+                              interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        left, top = max(int(x) - margin, 0), max(int(y) - margin, 0)
+        window = screenshot[top:top + template.shape[0] + 2 * margin, left:left + template.shape[1] + 2 * margin]
+        if template.shape[0] > window.shape[0] or template.shape[1] > window.shape[1]:
+            continue
+        _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))
+        if score > refined[0]:
+            refined = (score, scale, (left + location[0], top + location[1]))
+    return refined if refined[1] is not None else best
+
+
+def calibrate(screenshot, start_image, threshold=START_THRESHOLD, scale_range=CALIBRATION_SCALE_RANGE, steps=13,
+              search_scale=0.25):
+    """Return a calibrated Layout from a full screenshot showing the starting screen, or None.
+
+    The start element's 1080p position is taken as centred in START_AREA. When the
+    measured scale and offset agree with the estimate for this resolution (a standard
+    16:9 screen) the estimate is used exactly; otherwise the measured transform is.
+    The coarse search runs at search_scale of the 1080p size whatever the resolution.
+    """
+    resolution = (screenshot.shape[1], screenshot.shape[0])
+    estimate = estimate_layout(resolution)
+    scales = estimate.scale * np.linspace(1 - scale_range, 1 + scale_range, steps)
+    score, scale, location = locate_start_element(screenshot, start_image, scales, search_scale / estimate.scale)
+    if scale is None or score < threshold:
+        return None
+
+    # Where the element's top-left corner sits on a 1080p screen
+    base_x = START_AREA[0] + (START_AREA[2] - start_image.shape[1]) / 2
+    base_y = START_AREA[1] + (START_AREA[3] - start_image.shape[0]) / 2
+    offset = (location[0] - base_x * scale, location[1] - base_y * scale)
+    tolerance = 0.02 * resolution[1]
+    if abs(scale - estimate.scale) <= 0.02 * estimate.scale and abs(offset[0] - estimate.offset[0]) <= tolerance \
+            and abs(offset[1] - estimate.offset[1]) <= tolerance:
+        return estimate._replace(calibrated=True)
+    return make_layout(resolution, scale, offset, calibrated=True)
+
+
+def main():
+    from asset_cache import load_start_image
+
+    parser = argparse.ArgumentParser(description="Calibrate the scan areas from a screenshot of the starting screen.")
+    parser.add_argument("screenshot", help="full-screen capture showing the starting screen")
+    parser.add_argument("--show", action="store_true", help="draw the calibrated boxes on the screenshot and show it")
+    args = parser.parse_args()
+
+    screenshot = cv2.imread(args.screenshot)
+    if screenshot is None:
+        print(f"Could not read {args.screenshot}")
+        return
+    layout = calibrate(screenshot, load_start_image())
+    if layout is None:
+        print("Starting screen element not found; take the screenshot while the starting screen is shown")
+        return
+    save_layout(layout)
+    print(f"{_resolution_key(layout.resolution)}: scale {layout.scale:.3f}, offset "
+          f"({layout.offset[0]:.1f}, {layout.offset[1]:.1f}), saved to {CALIBRATION_PATH}")
+    print(f"  start area {layout.start_area}")
+    for i, area in enumerate(layout.areas):
+        print(f"  area {i + 1} {area}")
+    if args.show:
+        for x, y, width, height in layout.areas + [layout.start_area]:
+            cv2.rectangle(screenshot, (x, y), (x + width, y + height), (0, 255, 0), 2)
+        cv2.imshow("Calibration", screenshot)
+        cv2.waitKey(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import os
+import time
+import cv2
+import numpy as np
+from config import CAPTURE_BACKEND, REPLAY_FRAME_INTERVAL, FRAME_POOL_SIZE, IMAGE_EXTENSIONS
+from calibration import active_layout
+
+
+def capture_region(areas=None, start_area=None):
+    """Return the (left, top, width, height) bounding box covering every scanned area.
+
+    Defaults to the areas and starting screen box of the active layout.
+    """
+    layout = active_layout()
+    boxes = list(areas or layout.areas) + [start_area or layout.start_area]
+    left = min(x for x, _, _, _ in boxes)
+    top = min(y for _, y, _, _ in boxes)
+    right = max(x + w for x, _, w, _ in boxes)
+    bottom = max(y + h for _, y, _, h in boxes)
+    return left, top, right - left, bottom - top
+
+
+class Frame:
+    """A captured BGR image together with the screen position of its top-left corner."""
+
+    __slots__ = ('image', 'left', 'top', 'timestamp')
+
+    def __init__(self, image, left=0, top=0, timestamp=None):
+        self.image = image
+        self.left = left
+        self.top = top
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+
+    def crop(self, x, y, width, height):
+        """Return a view (no copy) of a screen-space box inside this frame."""
+        x -= self.left
+        y -= self.top
+        return self.image[y:y + height, x:x + width]
+
+    def crop_areas(self, areas=None):
+        """Return views for each of the given screen-space boxes (the active layout's areas by default)."""
+        return [self.crop(*area) for area in areas or active_layout().areas]
+
+
+class FramePool:
+    """A fixed ring of preallocated BGR image buffers that sources capture into.
+
+    take() hands out the buffers in turn, so a frame's image is overwritten len(pool)
+    grabs later; callers must not hold on to more frames than that. A buffer is only
+    reallocated when the capture size changes (e.g. after calibration).
+    """
+
+    def __init__(self, size=FRAME_POOL_SIZE):
+        self.buffers = [None] * size
+        self._next = 0
+
+    def __len__(self):
+        return len(self.buffers)
+
+    def take(self, height, width):
+        """Return the next buffer, a (height, width, 3) uint8 array with undefined contents."""
+        i = self._next
+        self._next = (i + 1) % len(self.buffers)
+        buffer = self.buffers[i]
+        if buffer is None or buffer.shape[:2] != (height, width):
+            self.buffers[i] = buffer = np.empty((height, width, 3), dtype=np.uint8)
+        return buffer
+
+
+class FrameSource:
+    """Base class for anything that can produce Frames."""
+
+    def grab(self):
+        """Return the next Frame, or None when the source is exhausted."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.grab()
+            if frame is None:
+                return
+            yield frame
+
+
+def _convert(image, code, pool):
+    """cv2.cvtColor into the next pool buffer, or into a new array without a pool."""
+    if pool is None:
+        return cv2.cvtColor(image, code)
+    return cv2.cvtColor(image, code, dst=pool.take(image.shape[0], image.shape[1]))
+
+
+class PyAutoGuiSource(FrameSource):
+    """Capture the scan region from the live screen with pyautogui."""
+
+    def __init__(self, region=None, pool=None):
+        import pyautogui
+        self._pyautogui = pyautogui
+        self.region = region or capture_region()
+        self.pool = pool
+
+    def grab(self):
+        left, top, width, height = self.region
+        timestamp = time.perf_counter()
+        screenshot = self._pyautogui.screenshot(region=(left, top, width, height))
+        image = _convert(np.asarray(screenshot), cv2.COLOR_RGB2BGR, self.pool)
+        return Frame(image, left, top, timestamp)
+
+
+class MssSource(FrameSource):
+    """Capture the scan region from the live screen with mss (faster than pyautogui)."""
+
+    def __init__(self, region=None, pool=None):
+        import mss
+        self._sct = mss.mss()
+        self.region = region or capture_region()
+        self.pool = pool
+
+    def grab(self):
+        left, top, width, height = self.region
+        timestamp = time.perf_counter()
+        shot = self._sct.grab({"left": left, "top": top, "width": width, "height": height})
+        image = _convert(np.asarray(shot), cv2.COLOR_BGRA2BGR, self.pool)
+        return Frame(image, left, top, timestamp)
+
+    def close(self):
+        self._sct.close()
+
+
+class ReplaySource(FrameSource):
+    """Replay full-screen frames from a video file or a directory of screenshots.
+
+    Frame timestamps come from the recording (video position, or a fixed interval
+    between screenshots) so timings match what the live scanner would have seen.
+    With a pool, video frames are decoded into its buffers.
+    """
+
+    def __init__(self, path, frame_interval=REPLAY_FRAME_INTERVAL, pool=None):
+        self.path = path
+        self.frame_interval = frame_interval
+        self.pool = pool
+        self._index = 0
+        self._capture = None
+        self._files = None
+        if os.path.isdir(path):
+            self._files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                                 if f.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            self._capture = cv2.VideoCapture(path)
+            if not self._capture.isOpened():
+                raise ValueError(f"Could not open replay source: {path}")
+
+    def grab(self):
+        if self._files is not None:
+            if self._index >= len(self._files):
+                return None
+            image = cv2.imread(self._files[self._index])
+            timestamp = self._index * self.frame_interval
+        else:
+            ok, image = self._read()
+            if not ok:
+                return None
+            timestamp = self._capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        self._index += 1
+        return Frame(image, 0, 0, timestamp)
+
+    def _read(self):
+        if self.pool is None:
+            return self._capture.read()
+        height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        return self._capture.read(self.pool.take(height, width))
+
+    def close(self):
+        if self._capture is not None:
+            self._capture.release()
+
+
+def create_source(backend=CAPTURE_BACKEND, path=None, region=None, pool_size=FRAME_POOL_SIZE,
+                  frame_interval=REPLAY_FRAME_INTERVAL):
+    """Create a frame source by name: 'pyautogui', 'mss' or 'replay' (needs path and, for a
+    folder of screenshots, frame_interval).
+
+    Live sources capture region, by default the bounding box of the active layout's areas.
+    With a pool_size, the source captures into a FramePool of that many buffers.
+    """
+    pool = FramePool(pool_size) if pool_size else None
+    if backend == "pyautogui":
+        return PyAutoGuiSource(region, pool)
+    if backend == "mss":
+        return MssSource(region, pool)
+    if backend == "replay":
+        return ReplaySource(path, frame_interval, pool)
+    raise ValueError(f"Unknown capture backend: {backend}")
+
+
+def screen_size(backend=CAPTURE_BACKEND):
+    """Return the (width, height) of the primary screen for a live backend, or None if unknown."""
+    try:
+        if backend == "pyautogui":
+            import pyautogui
+            width, height = pyautogui.size()
+            return width, height
+        if backend == "mss":
+            import mss
+            with mss.mss() as sct:
+                monitor = sct.monitors[1]
+                return monitor["width"], monitor["height"]
+    except Exception:
+        pass
+    return None
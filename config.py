@@ -1,5 +1,4 @@
 # config.py
-from datetime import datetime
 
 # Define the five areas to scan (x, y, width, height)
 AREAS = [
@@ -18,17 +17,105 @@ DISPLAY_AGENTS_FOLDER = "Agents/"
 DEFAULT_IMAGE_FOLDER = "agent_images/"  # Default state (no blue overlay, confirmed)
 SELECTED_IMAGE_FOLDER = "agent_images_selected/"  # Selected state (with blue overlay)
 START_SCREEN_FOLDER = "start_screen_images/"  # Starting screen reference image
+# Image files read from those folders and from screenshot folders being replayed (matched case-insensitively)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Preprocessed reference images and GUI thumbnails, rebuilt per entry when a source image changes.
+# Each layout scale gets its own file next to this path (reference_assets_<scale>.bin).
+ASSET_CACHE_PATH = "cache/reference_assets.bin"
+THUMBNAIL_SIZE = (100, 100)
+
+# Size of the live area previews in the GUI
+AREA_PREVIEW_SIZE = (142, 125)
+
+# Screen capture backend: "pyautogui" or "mss"
+CAPTURE_BACKEND = "pyautogui"
+
+# Scan worker timing (seconds) and GUI polling (milliseconds); see scheduler.py
+START_CHECK_INTERVAL = 0.5  # Between starting screen checks
+SCAN_INTERVAL = 0.2  # Between agent scans while areas are unlocked but not changing
+ACTIVE_SCAN_INTERVAL = 0.1  # Between agent scans while an unlocked area is changing
+IDLE_SCAN_INTERVAL = 1.0  # Between scans once every area is locked
+SETTLE_TIME = 2.0  # Seconds without changes before leaving the fast cadence
+EVENT_TIME_MIDPOINT = True  # Time selections/locks at the midpoint between the frame that saw them and the previous one
+SNAPSHOT_QUEUE_SIZE = 2  # Snapshots kept for the GUI; older ones are dropped
+GUI_POLL_INTERVAL = 50
+# Capture buffers reused round-robin, so long sessions do not allocate a new frame per grab (0 turns
+# pooling off). A pooled frame is overwritten FRAME_POOL_SIZE grabs later: the snapshot queue, the
+# snapshot the GUI is rendering and the frame being captured must all fit.
+FRAME_POOL_SIZE = SNAPSHOT_QUEUE_SIZE + 2
+
+# Opt-in per-stage timing (see telemetry.py): ring buffer size and where trace files go
+PROFILING = False
+TELEMETRY_BUFFER_SIZE = 4096
+TRACE_FOLDER = "traces/"
+
+# Seconds between frames when replaying a directory of screenshots
+REPLAY_FRAME_INTERVAL = 0.15
+
+# Agent matching engine, one of:
+#   "coarse"   low-resolution shortlist, then full-resolution matching of the shortlist
+#   "batched"  all slots vs. all templates in one pass
+#   "template" one matchTemplate per slot and template
+#   "masked"   greyscale portrait regions, one template per agent, selection told apart by colour
+#   "prior"    likely references first, stopping early at a decisive score (tune with match_tuning.py)
+MATCH_ENGINE = "coarse"
+
+# Masked matching: portrait region kept from each agent_images/ template as (top, bottom, left, right)
+# fractions, greyscale score needed for a match, and how much bluer (mean blue minus mean red) than
+# the locked portrait a match must be to count as selected
+PORTRAIT_ROI = (0.10, 0.75, 0.20, 0.80)
+MASKED_MATCH_THRESHOLD = 0.75
+SELECTED_TINT_THRESHOLD = 25.0
+
+# Prior-ordered matching: per-reference thresholds from match_tuning.py, the safety margin and lowest
+# threshold it may derive, the early-exit score for references it has not tuned, and how many of the
+# most picked agents (from the analytics store) are tried before falling back to the coarse shortlist
+MATCH_TUNING_PATH = "cache/match_tuning.json"
+MATCH_TUNING_MARGIN = 0.05
+MATCH_TUNING_FLOOR = 0.76
+EARLY_EXIT_SCORE = 0.97
+PRIOR_POPULAR_AGENTS = 2
+
+# Coarse-to-fine matching: downscale factor for the shortlist pass and number of templates kept per area
+PREFILTER_SCALE = 0.25
+PREFILTER_CANDIDATES = 4
+
+# Incremental scanning: skip locked areas and reuse the last match for areas that have not changed
+INCREMENTAL_SCAN = True
+CHANGE_THRESHOLD = 2.0  # Mean absolute difference (grey levels) of the area thumbnail that counts as a change
 
 # Comparison threshold
 MATCH_THRESHOLD = 0.86  # Adjusted for robustness
 
+# How per-frame matches become selections and locks: "voting" (N-of-M frame voting per slot, see
+# slot_tracker.py) or "legacy" (the first locked-agent match locks the slot, 1 s selection debounce).
+# Votes are confidence weighted: 1 at MATCH_THRESHOLD up to 2 for a perfect match.
+SLOT_TRACKING = "voting"
+SLOT_VOTE_WINDOW = 5  # Frames kept per slot
+SLOT_SELECT_VOTES = 1.5  # Votes in the window needed to select (hover) an agent
+SLOT_LOCK_VOTES = 3.0  # Votes in the window needed to lock an agent
+
 # Maximum dimensions for resizing reference images
 MAX_WIDTH = 141
 MAX_HEIGHT = 125
 
+# AREAS, START_AREA, MAX_WIDTH and MAX_HEIGHT are for this screen size; other resolutions are
+# calibrated once (see calibration.py) and cached per resolution
+BASE_RESOLUTION = (1920, 1080)
+CALIBRATION_PATH = "cache/calibration.json"
+AUTO_CALIBRATE = True  # Search full screenshots for the starting screen until this resolution is calibrated
+CALIBRATION_SCALE_RANGE = 0.15  # Scales tried around the estimate, as a fraction of it
+
 # Starting screen detection threshold
 START_THRESHOLD = 0.74 # Higher threshold for reliable starting screen detection
 
+# Starting screen prefilter (see start_detector.py): variants scoring below the threshold on a
+# downscaled copy of the box skip the full-size match. Recent confidences are kept for display.
+START_PREFILTER_SCALE = 0.25
+START_PREFILTER_THRESHOLD = 0.5
+START_HISTORY_SIZE = 120
+
 # Agent roles
 AGENT_ROLES = {
     "jett": "duelist",
@@ -63,5 +150,32 @@ AGENT_ROLES = {
     "tejo": "initiator"
 }
 
-CSV_FILENAME = f"data/valorant_scanner_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+# Reference image names that are alternative spellings of an agent
+AGENT_ALIASES = {
+    "brim": "brimstone",
+    "pheonix": "phoenix"
+}
+
+DATA_FOLDER = "data/"
+
+# Streaming session log: every hover, selection and lock, written in batches off the UI thread.
+# "binary" appends fixed-size records to a few large segment files; add "csv" to also write one file per
+# lobby (or convert segments later with: python session_log.py SEGMENT...).
+SESSION_LOG_FOLDER = "data/sessions/"
+SESSION_LOG_FORMATS = ("binary",)
+SESSION_LOG_FLUSH_INTERVAL = 2.0  # Seconds between batched writes
+SESSION_LOG_SEGMENT_SIZE = 16 * 1024 * 1024  # Start a new binary segment past this many bytes
+
+# Live feed: every hover, selection and lock pushed to local WebSocket clients (overlays, helpers) as it happens.
+# A client that falls more than LIVE_FEED_CLIENT_BACKLOG messages behind gets one state message instead.
+# Off by default: when on, the GUI binds LIVE_FEED_HOST:LIVE_FEED_PORT at startup.
+LIVE_FEED_ENABLED = False
+LIVE_FEED_HOST = "127.0.0.1"
+LIVE_FEED_PORT = 8765
+LIVE_FEED_CLIENT_BACKLOG = 256
+
+# Pick history and running aggregates for analyze.py and the Analytics page
+ANALYTICS_DB_PATH = "cache/analytics.sqlite"
+ANALYTICS_TIME_BUCKET = 5  # Seconds per bar of the selection/confirmation time histograms
+ANALYTICS_CHART_SIZE = (580, 320)  # Pixel size of each chart on the Analytics page
 ICON_IMAGE_PATH = f"../../Downloads/Valorant_AgentSelect_Info-main (1)/Valorant_AgentSelect_Info-main/Icon_image/icon.ico"
\ No newline at end of file
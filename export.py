@@ -0,0 +1,29 @@
+import csv
+import os
+from datetime import datetime
+from config import AGENT_ROLES, DATA_FOLDER
+
+CSV_HEADER = ['Area', 'Agent', 'Role', 'Confidence', 'Selected In (sec)', 'Confirmed In (sec)']
+
+
+def format_result_row(area_num, agent_name, score, sel_time, conf_time):
+    """Format one scanner result the way it is written to the CSV export."""
+    role = AGENT_ROLES.get(agent_name.lower(), "Unknown")
+    sel_time_str = f"{sel_time:.2f}" if sel_time is not None else "Not selected"
+    conf_time_str = f"{conf_time:.2f}" if conf_time is not None else "Not confirmed"
+    return [f"Area {area_num}", agent_name, role, f"{score:.2f}", sel_time_str, conf_time_str]
+
+
+def results_csv_path(folder=DATA_FOLDER):
+    """Return a new timestamped CSV path in folder, creating the folder if needed."""
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"valorant_scanner_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+
+
+def write_results_csv(csv_filename, results):
+    """Write scanner results (area_num, agent_name, score, sel_time, conf_time) to a CSV file."""
+    with open(csv_filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(CSV_HEADER)
+        for result in results:
+            writer.writerow(format_result_row(*result))
@@ -1,18 +1,17 @@
 import customtkinter as ctk
 import time
-import os
-import csv
-from datetime import datetime
-import pyautogui
 from PIL import Image
-import cv2
-import numpy as np
-from config import AGENT_ROLES, AREAS, CSV_FILENAME, ICON_IMAGE_PATH, START_THRESHOLD, DEFAULT_IMAGE_FOLDER, DISPLAY_AGENTS_FOLDER
-from scanner import scan_and_identify_agents, capture_screen_area, reset_scanner_state
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from PIL import ImageTk
+from config import AGENT_ROLES, ICON_IMAGE_PATH, GUI_POLL_INTERVAL, THUMBNAIL_SIZE, AREA_PREVIEW_SIZE, \
+    ANALYTICS_CHART_SIZE, LIVE_FEED_ENABLED
+from scanner import capture_screen_area, ScanSession
+from scan_worker import ScanWorker, select_screen_layout
+from asset_cache import load_reference_assets
+from export import results_csv_path, write_results_csv
+from session_log import SessionLog
+from live_feed import LiveFeed
+from analytics_charts import CHARTS, ChartCache
+from previews import PreviewBuffers
+import telemetry
 
 class ValorantScannerGUI:
     def __init__(self, root):
@@ -31,31 +30,62 @@ class ValorantScannerGUI:
         except Exception:
             pass
 
+        # Use the calibrated (or estimated) scan areas for this screen resolution
+        select_screen_layout()
+
         self.start_time = None
         self.last_results = []
-        self.area_images = [None] * 5
         self.area_labels = [None] * 5
+        # Area previews are rendered into reused buffers shown through one long-lived CTkImage per area
+        self.preview_buffers = PreviewBuffers(5)
+        self.area_images = [None] * 5
+        self.area_shown = [False] * 5
+        # Last options passed to each label, so unchanged cells are not reconfigured
+        self.displayed = {}
         self.is_scanning = False
+        self.status_error = False  # The status label shows a scan error
         self.pages = {}
         self.current_page = None
-
-        # Load agent images
+        # Capture and scanning run on a worker thread; the GUI polls its snapshots
+        self.scan_session = ScanSession(record_events=True)
+        self.scan_worker = None
+        # Every hover, selection and lock is streamed to the session log as it happens
+        self.session_log = SessionLog()
+        self.session_log.start()
+        # ... and pushed to local overlays and tools over the live feed
+        self.live_feed = None
+        live_feed_error = None
+        if LIVE_FEED_ENABLED:
+            try:
+                self.live_feed = LiveFeed()
+                self.live_feed.start()
+            except OSError as e:  # E.g. the port is taken by another instance
+                live_feed_error = e
+        self.update_after_id = None
+        self.last_overlay_update = 0.0
+
+        # Load agent images (preprocessed thumbnails from the asset cache)
         self.agent_images = {}
-        for image_file in os.listdir(DISPLAY_AGENTS_FOLDER):
-            if image_file.endswith('.png'):
-                agent_name = os.path.splitext(image_file)[0]
-                img_path = os.path.join(DISPLAY_AGENTS_FOLDER, image_file)
-                img = Image.open(img_path).resize((100, 100), Image.Resampling.LANCZOS)
-                self.agent_images[agent_name] = ctk.CTkImage(light_image=img, dark_image=img, size=(100, 100))
+        for agent_name, thumbnail in load_reference_assets()['thumbnails'].items():
+            img = Image.fromarray(thumbnail)
+            self.agent_images[agent_name] = ctk.CTkImage(light_image=img, dark_image=img, size=THUMBNAIL_SIZE)
 
         # Page container
         self.page_container = ctk.CTkFrame(self.root, corner_radius=10)
         self.page_container.pack(fill="both", expand=True, padx=12, pady=12)
 
+        # Analytics charts are rendered in the background and cached until new results land
+        self.chart_cache = ChartCache()
+        self.chart_images = {}
+        self.chart_version = 0
+
         # Build both pages
         self.build_main_page()
         self.build_analytics_page()
         self.show_page('main')
+        self.chart_cache.refresh()  # Have the charts ready before the page is first opened
+        if live_feed_error is not None:
+            self.status_label.configure(text=f"Status: Live feed disabled: {live_feed_error}", text_color="red")
 
     def build_main_page(self):
         page = ctk.CTkFrame(self.page_container)
@@ -83,6 +113,15 @@ class ValorantScannerGUI:
         self.reset_button = ctk.CTkButton(self.button_frame, text="Reset", command=self.reset_gui)
         self.reset_button.pack(side="left")
 
+        # Live timing overlay and trace export, only when profiling is enabled
+        self.telemetry_label = None
+        if telemetry.enabled:
+            self.trace_button = ctk.CTkButton(self.button_frame, text="Dump Trace", command=self.dump_trace)
+            self.trace_button.pack(side="left", padx=(5, 0))
+            self.telemetry_label = ctk.CTkLabel(page, text="Profiling: waiting for scans", text_color="gray",
+                                                font=ctk.CTkFont(size=12))
+            self.telemetry_label.pack(anchor="w", pady=(0, 8))
+
         # Lobby Team Comp Distribution
         self.role_summary_label = ctk.CTkLabel(page, text="Team Composition: None",
                                                font=ctk.CTkFont(size=18), text_color="white")
@@ -101,6 +140,7 @@ class ValorantScannerGUI:
         self.table_frame.pack(fill="both", expand=True, pady=5)
         self.tree_rows = [None] * 5
         self.row_labels = [[] for _ in range(5)]
+        self.row_shown = [False] * 5
         headers = ["Player", "Agent", "Role", "Confidence", "Selected In", "Confirmed In"]
         header_row = ctk.CTkFrame(self.table_frame, fg_color="transparent")
         header_row.pack(fill="x", pady=(0, 4))
@@ -120,31 +160,24 @@ class ValorantScannerGUI:
         """Reset the GUI and scanner state, stopping any active scans."""
         # Stop scanning if active
         if self.is_scanning:
-            self.is_scanning = False
-            self.start_time = None
+            self.stop_scanning()  # Stops the worker and cancels the scheduled poll
             self.start_button.configure(text="Start Scanning")
             self.status_label.configure(text="Status: Reset Complete", text_color="green")
-            self.root.after_cancel(self.check_starting_screen)  # Cancel scheduled checks
-            self.root.after_cancel(self.update_results)  # Cancel scheduled updates
 
         # Clear GUI data
         self.last_results = []
+        self.displayed.clear()
+        self.preview_buffers.reset()
         self.role_summary_label.configure(text="Team Composition: None")
-        # Destroy and recreate area labels to avoid stale image references
+        # Blank the area labels and hide the table rows; both are reused by the next lobby
         for i in range(5):
-            if self.area_labels[i] is not None:
-                self.area_labels[i].destroy()
-            self.area_labels[i] = ctk.CTkLabel(self.area_frame, text=f"Area {i+1}", width=142, height=125)
-            self.area_labels[i].pack(side="left", padx=5)
-            self.area_images[i] = None
-            # Clear table rows
-            if self.tree_rows[i] is not None:
-                self.tree_rows[i].destroy()
-                self.tree_rows[i] = None
-                self.row_labels[i] = []
+            self.hide_area_image(i)
+            if self.row_shown[i]:
+                self.tree_rows[i].pack_forget()
+                self.row_shown[i] = False
 
         # Reset scanner state
-        reset_scanner_state()
+        self.scan_session.reset()
 
     def build_analytics_page(self):
         page = ctk.CTkFrame(self.page_container, fg_color="transparent")
@@ -157,6 +190,16 @@ class ValorantScannerGUI:
         # Frame environment
         self.analytics_image_frame = ctk.CTkFrame(page, fg_color="transparent")
         self.analytics_image_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.analytics_status_label = ctk.CTkLabel(page, text="Loading charts...", text_color="gray",
+                                                   font=ctk.CTkFont(size=12))
+        self.analytics_status_label.pack(pady=(0, 5))
+        # Two by two grid of charts
+        self.chart_labels = {}
+        for i, title in enumerate(CHARTS):
+            label = ctk.CTkLabel(self.analytics_image_frame, text=title, width=ANALYTICS_CHART_SIZE[0],
+                                 height=ANALYTICS_CHART_SIZE[1])
+            label.grid(row=i // 2, column=i % 2, padx=5, pady=5)
+            self.chart_labels[title] = label
 
         # Ensure the back button is properly configured
         self.back_btn = ctk.CTkButton(page, text="Back to Scanner", command=self.show_main_page)
@@ -171,6 +214,27 @@ class ValorantScannerGUI:
     def show_analytics_page(self):
         print("Switching to analytics page")
         self.show_page('analytics')
+        # Show the cached charts right away; a refresh only redraws if new results arrived
+        self.chart_cache.refresh()
+        self.update_charts()
+
+    def update_charts(self):
+        """Swap in newly rendered charts, polling until the background refresh finishes."""
+        cache = self.chart_cache
+        if cache.version != self.chart_version and cache.images is not None:
+            self.chart_version = cache.version
+            for title, image in cache.images.items():
+                self.chart_images[title] = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+                self.chart_labels[title].configure(image=self.chart_images[title], text="")
+        if cache.error is not None:
+            self.analytics_status_label.configure(text=f"Analytics unavailable: {cache.error}", text_color="red")
+        elif cache.busy:
+            self.analytics_status_label.configure(text="Updating charts...", text_color="gray")
+        else:
+            self.analytics_status_label.configure(text=f"{cache.picks} picks recorded",
+                                                  text_color="gray")
+        if cache.busy and self.current_page == 'analytics':
+            self.root.after(200, self.update_charts)
 
     def show_main_page(self):
         print("Switching to main page")
@@ -180,29 +244,38 @@ class ValorantScannerGUI:
         if not self.last_results:
             self.status_label.configure(text="No data to export", text_color="red")
             return
-        csv_filename = CSV_FILENAME
         try:
-            with open(csv_filename, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Area', 'Agent', 'Role', 'Confidence', 'Selected In (sec)', 'Confirmed In (sec)'])
-                for area_num, agent_name, score, sel_time, conf_time in self.last_results:
-                    role = AGENT_ROLES.get(agent_name.lower(), "Unknown")
-                    sel_time_str = f"{sel_time:.2f}" if sel_time is not None else "Not selected"
-                    conf_time_str = f"{conf_time:.2f}" if conf_time is not None else "Not confirmed"
-                    writer.writerow([f"Area {area_num}", agent_name, role, f"{score:.2f}", sel_time_str, conf_time_str])
+            csv_filename = results_csv_path()
+            write_results_csv(csv_filename, self.last_results)
             self.status_label.configure(text=f"Exported to {csv_filename}", text_color="green")
+            self.chart_cache.refresh()  # Fold the new results into the analytics charts
         except Exception as e:
             self.status_label.configure(text=f"Export failed: {str(e)}", text_color="red")
 
+    def dump_trace(self):
+        try:
+            path = telemetry.dump_trace()
+            self.status_label.configure(text=f"Trace written to {path}", text_color="green")
+        except Exception as e:
+            self.status_label.configure(text=f"Trace export failed: {str(e)}", text_color="red")
+
+    def configure_label(self, label, **options):
+        """Configure label only if options differ from what it currently shows."""
+        if self.displayed.get(label) != options:
+            self.displayed[label] = options
+            label.configure(**options)
+
     def update_row_content(self, row_idx, area_num, agent_name, score, sel_time, conf_time):
         if self.tree_rows[row_idx] is None:
             self.tree_rows[row_idx] = ctk.CTkFrame(self.table_frame, fg_color="transparent")
-            self.tree_rows[row_idx].pack(fill="x", pady=1)
-            self.row_labels[row_idx] = []
             for _ in range(6):
                 label = ctk.CTkLabel(self.tree_rows[row_idx], width=150, anchor="center")
                 label.pack(side="left", padx=5)
                 self.row_labels[row_idx].append(label)
+        if not self.row_shown[row_idx]:
+            # Rows are filled in order, so re-packing after a reset keeps them in area order
+            self.tree_rows[row_idx].pack(fill="x", pady=1)
+            self.row_shown[row_idx] = True
 
         labels = self.row_labels[row_idx]
         sel_time_str = f"{sel_time:.2f} sec" if sel_time is not None else "Not selected"
@@ -211,82 +284,127 @@ class ValorantScannerGUI:
                   f"{score:.2f}", sel_time_str, conf_time_str]
 
         if agent_name in self.agent_images:
-            labels[1].configure(image=self.agent_images[agent_name], text="")
+            self.configure_label(labels[1], image=self.agent_images[agent_name], text="")
         else:
-            labels[1].configure(text="Unknown", image=None)
+            self.configure_label(labels[1], text="Unknown", image=None)
         for i, val in enumerate(values):
             if i != 1:
-                labels[i].configure(text=val)
+                self.configure_label(labels[i], text=val)
 
-    def update_area_images(self, full_screen):
-        for i, (x, y, width, height) in enumerate(AREAS):
+    def update_area_images(self, frame):
+        for i, (x, y, width, height) in enumerate(self.scan_session.areas):
             try:
-                screen_area = capture_screen_area(x, y, width, height, full_screen)
-                screen_area_rgb = cv2.cvtColor(screen_area, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(screen_area_rgb).resize((142, 125), Image.Resampling.LANCZOS)
-                # Create new CTkImage and store reference
-                self.area_images[i] = ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=(142, 125))
-                self.area_labels[i].configure(image=self.area_images[i], text="")
+                screen_area = capture_screen_area(x, y, width, height, frame)
+                if not self.preview_buffers.update(i, screen_area) and self.area_shown[i]:
+                    continue  # Area unchanged since the last tick
+                pil_img = self.preview_buffers.images[i]
+                if self.area_images[i] is None:
+                    self.area_images[i] = ctk.CTkImage(light_image=pil_img, dark_image=pil_img,
+                                                       size=AREA_PREVIEW_SIZE)
+                else:
+                    # Same buffer-backed image with new pixels: the CTkImage redraws its scaled photo
+                    self.area_images[i].configure(light_image=pil_img, dark_image=pil_img)
+                if not self.area_shown[i]:
+                    self.area_labels[i].configure(image=self.area_images[i], text="")
+                    self.area_shown[i] = True
             except Exception as e:
                 print(f"Error updating area image {i+1}: {e}")
-                self.area_labels[i].configure(image=None, text=f"Area {i+1}")
+                self.hide_area_image(i)
+
+    def hide_area_image(self, i):
+        if self.area_shown[i]:
+            self.area_labels[i].configure(image=None, text=f"Area {i+1}")
+            self.area_shown[i] = False
+            self.preview_buffers.last_areas[i] = None
 
     def toggle_scanning(self):
         if not self.is_scanning:
             self.is_scanning = True
+            self.status_error = False
             self.start_button.configure(text="Stop Scanning")
             self.status_label.configure(text="Status: Waiting for Starting Screen", text_color="orange")
-            self.check_starting_screen()
+            self.scan_worker = ScanWorker(self.scan_session, session_log=self.session_log, live_feed=self.live_feed)
+            self.scan_worker.start()
             self.update_results()
         else:
-            self.is_scanning = False
-            self.start_time = None
+            self.stop_scanning()
             self.start_button.configure(text="Start Scanning")
             self.status_label.configure(text="Status: Scanning Stopped", text_color="red")
-            self.root.after_cancel(self.check_starting_screen)
-            self.root.after_cancel(self.update_results)
 
-    def update_results(self):
-        if not self.is_scanning:
-            return
-        if self.start_time is not None:
-            try:
-                full_screen = cv2.cvtColor(np.array(pyautogui.screenshot()), cv2.COLOR_RGB2BGR)
-                self.last_results = scan_and_identify_agents(self.start_time) or []
-                self.update_area_images(full_screen)
-            except Exception as e:
-                print(f"Scan error: {e}")
-                self.last_results = []
-                # Reset area images on error to prevent stale references
-                for i in range(5):
-                    self.area_labels[i].configure(image=None, text=f"Area {i+1}")
-                    self.area_images[i] = None
-
-            for i, (area_num, agent_name, score, sel_time, conf_time) in enumerate(self.last_results):
-                if i < 5:
-                    self.update_row_content(i, area_num, agent_name, score, sel_time, conf_time)
-
-            if self.last_results:
-                role_counts = {"duelist": 0, "sentinel": 0, "smokes": 0, "initiator": 0}
-                for _, agent_name, _, _, _ in self.last_results:
-                    role = AGENT_ROLES.get(agent_name.lower(), "Unknown")
-                    if role in role_counts:
-                        role_counts[role] += 1
-                summary = ", ".join(f"{count} {role.capitalize()}" for role, count in role_counts.items() if count > 0)
-                self.role_summary_label.configure(text=f"Team Composition: {summary or 'None'}")
-            else:
-                self.role_summary_label.configure(text="Team Composition: None")
+    def close(self):
+        """Stop scanning, write out the session log, close the live feed and close the window."""
+        self.stop_scanning()
+        self.session_log.close()
+        if self.live_feed is not None:
+            self.live_feed.close()
+        self.root.destroy()
 
-        self.root.after(150, self.update_results)
+    def stop_scanning(self):
+        """Stop the scan worker and cancel the pending result poll."""
+        self.is_scanning = False
+        self.start_time = None
+        if self.scan_worker is not None:
+            self.scan_worker.stop()
+            self.scan_worker = None
+        if self.update_after_id is not None:
+            self.root.after_cancel(self.update_after_id)
+            self.update_after_id = None
 
-    def check_starting_screen(self):
+    def update_results(self):
+        """Render the latest snapshot from the scan worker, then poll again."""
+        self.update_after_id = None
         if not self.is_scanning:
             return
-        if self.start_time is None:
-            result = scan_and_identify_agents(None)
-            start_score = scan_and_identify_agents.start_score
-            print(f"Starting screen confidence: {start_score:.2f}")
-            if start_score > START_THRESHOLD:
-                self.start_time = time.perf_counter()
+        snapshot = self.scan_worker.latest()
+        if snapshot is not None:
+            with telemetry.stage("render"):
+                self.render_snapshot(snapshot)
+        if self.telemetry_label is not None and time.perf_counter() - self.last_overlay_update >= 0.5:
+            self.last_overlay_update = time.perf_counter()
+            self.telemetry_label.configure(text=f"Profiling: {telemetry.format_summary()}")
+        self.update_after_id = self.root.after(GUI_POLL_INTERVAL, self.update_results)
+
+    def render_snapshot(self, snapshot):
+        if snapshot.start_time is not None and self.start_time is None:
+            self.start_time = snapshot.start_time
+            self.status_label.configure(text="Status: Scanning for agents", text_color="#5D8BF4")
+        # Errors are shown whether or not the starting screen has been seen yet
+        if snapshot.error is not None:
+            print(f"Scan error: {snapshot.error}")
+            self.status_label.configure(text=f"Status: Scan error: {snapshot.error}", text_color="red")
+            self.status_error = True
+        elif self.status_error:
+            self.status_error = False
+            if self.start_time is None:
+                self.status_label.configure(text="Status: Waiting for Starting Screen", text_color="orange")
+            else:
                 self.status_label.configure(text="Status: Scanning for agents", text_color="#5D8BF4")
-        self.root.after(500, self.check_starting_screen)
\ No newline at end of file
+        if snapshot.start_time is None:
+            if snapshot.error is None:
+                print(f"Starting screen confidence: {snapshot.start_score:.2f}")
+            return
+
+        if snapshot.error is not None:
+            self.last_results = []
+            # Hide area images on error so stale previews are not left on screen
+            for i in range(5):
+                self.hide_area_image(i)
+        else:
+            self.last_results = list(snapshot.results)
+            with telemetry.stage("previews"):
+                self.update_area_images(snapshot.frame)
+
+        for i, (area_num, agent_name, score, sel_time, conf_time) in enumerate(self.last_results):
+            if i < 5:
+                self.update_row_content(i, area_num, agent_name, score, sel_time, conf_time)
+
+        if self.last_results:
+            role_counts = {"duelist": 0, "sentinel": 0, "smokes": 0, "initiator": 0}
+            for _, agent_name, _, _, _ in self.last_results:
+                role = AGENT_ROLES.get(agent_name.lower(), "Unknown")
+                if role in role_counts:
+                    role_counts[role] += 1
+            summary = ", ".join(f"{count} {role.capitalize()}" for role, count in role_counts.items() if count > 0)
+            self.configure_label(self.role_summary_label, text=f"Team Composition: {summary or 'None'}")
+        else:
+            self.configure_label(self.role_summary_label, text="Team Composition: None")
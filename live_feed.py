@@ -0,0 +1,381 @@
+"""Local WebSocket feed that pushes every slot transition the moment the scanner sees it.
+
+Overlays and other tools connect to ws://LIVE_FEED_HOST:LIVE_FEED_PORT and receive one
+compact JSON text message per event:
+
+    {"event": "lobby", "lobby": 1721063103000}
+    {"event": "lock", "lobby": 1721063103000, "area": 1, "agent": "jett", "role": "duelist",
+     "score": 0.931, "elapsed": 12.34}
+
+event is "lobby" (a new lobby started; forget earlier slots), "hover", "select" or
+"lock". Right after connecting, and whenever a client has fallen too far behind, it
+gets a "state" message instead: {"event": "state", "lobby": ..., "slots": [...]} with
+the last event of each area (or null).
+
+The scan thread only queues events (LiveFeed.publish never blocks). A server thread
+sends them with non-blocking sockets; each client has its own backlog of at most
+LIVE_FEED_CLIENT_BACKLOG messages. When a slow client's backlog fills up, the backlog is
+dropped and replaced by one state message, so a stalled client costs bounded memory and
+catches up with the current lobby as soon as it reads again.
+
+Watch the feed with the test client: python live_feed.py [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import queue
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from config import AGENT_ROLES, LIVE_FEED_HOST, LIVE_FEED_PORT, LIVE_FEED_CLIENT_BACKLOG
+from matcher import reference_identity
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_REQUEST_SIZE = 16384  # Bytes a client may send before completing the handshake
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def event_message(lobby, event, i, agent_name, score, elapsed):
+    """The feed message for one (event, area index, reference name, score, elapsed) ScanSession event."""
+    agent = reference_identity(agent_name)[0]
+    return {"event": event, "lobby": lobby, "area": i + 1, "agent": agent, "role": AGENT_ROLES.get(agent, "Unknown"),
+            "score": round(score, 3), "elapsed": round(elapsed, 3)}
+
+
+def encode_frame(payload, opcode=OPCODE_TEXT, mask=False):
+    """One final WebSocket frame; clients must mask what they send, servers must not."""
+    length = len(payload)
+    if length < 126:
+        header = bytes((0x80 | opcode, (0x80 if mask else 0) | length))
+    elif length < 1 << 16:
+        header = bytes((0x80 | opcode, (0x80 if mask else 0) | 126)) + length.to_bytes(2, 'big')
+    else:
+        header = bytes((0x80 | opcode, (0x80 if mask else 0) | 127)) + length.to_bytes(8, 'big')
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + bytes(b ^ key[k % 4] for k, b in enumerate(payload))
+
+
+def decode_frames(buffer):
+    """Remove complete frames from the start of a bytearray; returns [(opcode, payload)]."""
+    frames = []
+    while len(buffer) >= 2:
+        opcode = buffer[0] & 0x0F
+        masked = buffer[1] & 0x80
+        length = buffer[1] & 0x7F
+        position = 2
+        if length >= 126:
+            size = 2 if length == 126 else 8
+            if len(buffer) < position + size:
+                break
+            length = int.from_bytes(buffer[position:position + size], 'big')
+            position += size
+        key = None
+        if masked:
+            if len(buffer) < position + 4:
+                break
+            key = bytes(buffer[position:position + 4])
+            position += 4
+        if len(buffer) < position + length:
+            break
+        payload = bytes(buffer[position:position + length])
+        if key is not None:
+            payload = bytes(b ^ key[k % 4] for k, b in enumerate(payload))
+        del buffer[:position + length]
+        frames.append((opcode, payload))
+    return frames
+
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1(key.encode() + WEBSOCKET_GUID).digest()).decode()
+
+
+class _Client:
+    __slots__ = ('sock', 'inbox', 'backlog', 'sending', 'open', 'resyncs')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbox = bytearray()
+        self.backlog = deque()  # Encoded frames waiting to be sent
+        self.sending = b""  # Unsent rest of the frame in flight, kept whole so the stream stays valid
+        self.open = False  # Handshake done
+        self.resyncs = 0
+
+
+class LiveFeed(threading.Thread):
+    """WebSocket server thread for ScanSession events; binds its socket when created.
+
+    start_lobby() and publish() only queue, so they are safe to call from the scan loop.
+    Use port 0 to bind any free port (see .port).
+    """
+
+    def __init__(self, host=LIVE_FEED_HOST, port=LIVE_FEED_PORT, client_backlog=LIVE_FEED_CLIENT_BACKLOG):
+        super().__init__(name="LiveFeed", daemon=True)
+        self.client_backlog = client_backlog
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+        self.queue = queue.SimpleQueue()
+        # Written to by publishing threads to wake the server thread
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.wakeup_reader.setblocking(False)
+        self.wakeup_writer.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ, "listener")
+        self.selector.register(self.wakeup_reader, selectors.EVENT_READ, "wakeup")
+        self.clients = {}  # socket -> _Client
+        self.lobby = None
+        self.slots = []  # Last message per area of the current lobby
+
+    def start_lobby(self, lobby=None):
+        """Announce a new lobby (by default stamped with the current time) and return its id."""
+        lobby = int(time.time() * 1000) if lobby is None else lobby
+        self._put(("lobby", lobby, None))
+        return lobby
+
+    def publish(self, events):
+        """Queue (event, area index, agent, score, elapsed) tuples for the current lobby."""
+        if events:
+            self._put(("events", None, events))
+
+    def close(self, timeout=1.0):
+        self._put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+    def _put(self, item):
+        self.queue.put(item)
+        try:
+            self.wakeup_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Already awake (the wakeup buffer is full) or shutting down
+
+    def run(self):
+        try:
+            while True:
+                for key, mask in self.selector.select():
+                    if key.data == "listener":
+                        self._accept()
+                    elif key.data == "wakeup":
+                        if not self._drain_queue():
+                            return
+                    else:
+                        client = key.data
+                        if mask & selectors.EVENT_READ:
+                            self._read(client)
+                        if mask & selectors.EVENT_WRITE and client.sock in self.clients:
+                            self._flush(client)
+        finally:
+            for client in list(self.clients.values()):
+                self._drop(client)
+            self.selector.close()
+            self.listener.close()
+            self.wakeup_reader.close()
+            self.wakeup_writer.close()
+
+    def _drain_queue(self):
+        """Send everything queued; returns False once close() was called."""
+        try:
+            while self.wakeup_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return True
+            if item is None:
+                return False
+            kind, lobby, events = item
+            if kind == "lobby":
+                self.lobby = lobby
+                self.slots = []
+                self._broadcast({"event": "lobby", "lobby": lobby})
+                continue
+            for event in events:
+                message = event_message(self.lobby, *event)
+                area = message["area"]
+                self.slots.extend([None] * (area - len(self.slots)))
+                self.slots[area - 1] = message
+                self._broadcast(message)
+
+    def _state_frame(self):
+        return encode_frame(json.dumps({"event": "state", "lobby": self.lobby, "slots": self.slots},
+                                       separators=(',', ':')).encode())
+
+    def _broadcast(self, message):
+        frame = encode_frame(json.dumps(message, separators=(',', ':')).encode())
+        for client in list(self.clients.values()):
+            if not client.open:
+                continue
+            if len(client.backlog) >= self.client_backlog:
+                # Too far behind: replace everything it has not started receiving with the current state
+                client.backlog.clear()
+                client.backlog.append(self._state_frame())
+                client.resyncs += 1
+            else:
+                client.backlog.append(frame)
+            self._flush(client)
+
+    def _accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = _Client(sock)
+        self.clients[sock] = client
+        self.selector.register(sock, selectors.EVENT_READ, client)
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client)
+            return
+        client.inbox += data
+        if not client.open:
+            self._handshake(client)
+            return
+        for opcode, payload in decode_frames(client.inbox):
+            if opcode == OPCODE_CLOSE:
+                client.backlog.append(encode_frame(payload[:2], OPCODE_CLOSE))
+                self._flush(client)
+                self._drop(client)
+                return
+            if opcode == OPCODE_PING:
+                client.backlog.append(encode_frame(payload, OPCODE_PONG))
+                self._flush(client)
+        if len(client.inbox) > MAX_REQUEST_SIZE:
+            self._drop(client)
+
+    def _handshake(self, client):
+        end = client.inbox.find(b"\r\n\r\n")
+        if end < 0:
+            if len(client.inbox) > MAX_REQUEST_SIZE:
+                self._drop(client)
+            return
+        headers = {}
+        for line in client.inbox[:end].decode('latin-1').split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        del client.inbox[:end + 4]
+        key = headers.get("sec-websocket-key")
+        if key is None or headers.get("upgrade", "").lower() != "websocket":
+            client.sending = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+            self._flush(client)
+            self._drop(client)
+            return
+        client.sending = ("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode()
+        client.open = True
+        client.backlog.append(self._state_frame())
+        self._flush(client)
+
+    def _flush(self, client):
+        """Send as much as the socket takes without blocking; wait for writability for the rest."""
+        try:
+            while True:
+                if not client.sending:
+                    if not client.backlog:
+                        break
+                    client.sending = client.backlog.popleft()
+                sent = client.sock.send(client.sending)
+                client.sending = client.sending[sent:]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._drop(client)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.sending else 0)
+        if client.sock in self.clients and self.selector.get_key(client.sock).events != events:
+            self.selector.modify(client.sock, events, client)
+
+    def _drop(self, client):
+        if self.clients.pop(client.sock, None) is not None:
+            self.selector.unregister(client.sock)
+        client.sock.close()
+
+
+class LiveFeedClient:
+    """Minimal blocking WebSocket client for the feed, used by the test client and benchmarks."""
+
+    def __init__(self, host=LIVE_FEED_HOST, port=LIVE_FEED_PORT, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((f"GET / HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                           f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        self.buffer = bytearray()
+        while b"\r\n\r\n" not in self.buffer:
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError("Connection closed during the handshake")
+            self.buffer += data
+        end = self.buffer.find(b"\r\n\r\n")
+        response = self.buffer[:end].decode('latin-1')
+        del self.buffer[:end + 4]
+        if " 101 " not in response.split("\r\n")[0] or accept_key(key) not in response:
+            raise ConnectionError(f"Handshake refused: {response.splitlines()[0]}")
+        self.frames = deque()
+
+    def receive(self):
+        """Return the next message as a dict, or None once the server closes the connection."""
+        while not self.frames:
+            self.frames.extend(frame for frame in decode_frames(self.buffer) if frame[0] in (OPCODE_TEXT, OPCODE_CLOSE))
+            if self.frames:
+                break
+            data = self.sock.recv(65536)
+            if not data:
+                return None
+            self.buffer += data
+        opcode, payload = self.frames.popleft()
+        return json.loads(payload) if opcode == OPCODE_TEXT else None
+
+    def close(self):
+        try:
+            self.sock.sendall(encode_frame(b"\x03\xe8", OPCODE_CLOSE, mask=True))
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the scanner's live feed.")
+    parser.add_argument("--host", default=LIVE_FEED_HOST)
+    parser.add_argument("--port", type=int, default=LIVE_FEED_PORT)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait after each message (a slow client)")
+    args = parser.parse_args()
+
+    client = LiveFeedClient(args.host, args.port, timeout=None)
+    print(f"Connected to ws://{args.host}:{args.port}")
+    try:
+        while True:
+            message = client.receive()
+            if message is None:
+                print("Feed closed")
+                return
+            print(json.dumps(message))
+            if args.delay:
+                time.sleep(args.delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
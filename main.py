@@ -4,7 +4,7 @@ from gui import ValorantScannerGUI
 def main():
     root = ctk.CTk()
     app = ValorantScannerGUI(root)
-    app.check_starting_screen()
+    root.protocol("WM_DELETE_WINDOW", app.close)
     app.update_results()
     root.mainloop()
 
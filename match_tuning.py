@@ -0,0 +1,119 @@
+"""Per-reference accept thresholds and early-exit scores from a cross-template confusion matrix.
+
+Every reference image is pasted into a slot-sized patch of noisy background (plus a few
+empty patches) and scored against every template. For each template the tool records
+the best score anything else gets on it (its impostor score) and, when its own image is
+shown, the best score any other reference reaches (its rival score). Another image of
+the same agent in the same state (e.g. viper_blue.png and viper_blue2.png) is neither.
+
+From those:
+- threshold: the impostor score plus a safety margin, kept between MATCH_TUNING_FLOOR
+  and MATCH_THRESHOLD, so distinctive portraits are accepted at lower scores.
+- decisive: a score no impostor or rival reached on the test slots (plus the margin); once
+  a template scores this high, matching stops. This is a heuristic: real screen crops can
+  still let another reference score higher (see benchmarks/bench_prior.py).
+
+The "prior" engine (see PriorMatcher) reads the result from MATCH_TUNING_PATH with
+matcher.load_tuning.
+
+Usage: python match_tuning.py [--rounds 3] [--noise 6] [--show 10]
+"""
+import argparse
+import json
+import os
+import cv2
+import numpy as np
+from config import MATCH_THRESHOLD, MATCH_TUNING_PATH, MATCH_TUNING_MARGIN, MATCH_TUNING_FLOOR
+from matcher import reference_identity
+
+
+def _slot(rng, shape, picture, noise):
+    """A slot-sized BGR patch of blurred background with picture pasted in its top-left corner."""
+    height, width = shape
+    slot = cv2.GaussianBlur(rng.integers(20, 60, (height, width, 3), dtype=np.uint8), (7, 7), 0)
+    if picture is not None:
+        h, w = min(picture.shape[0], height), min(picture.shape[1], width)
+        slot[:h, :w] = picture[:h, :w]
+    noisy = slot.astype(np.float32) + rng.normal(0, noise, slot.shape).astype(np.float32)
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def confusion_matrix(reference_images, reference_bank, shape, rounds=3, noise=6.0, empty=5, seed=0):
+    """Score every reference, shown in a noisy slot, against every template of reference_bank.
+
+    Returns (labels, scores): the reference shown in each row (None for an empty slot) and a
+    (rows, templates) array of scores in reference_bank.names order.
+    """
+    rng = np.random.default_rng(seed)
+    labels = [name for _ in range(rounds) for name in reference_images] + [None] * empty
+    slots = [_slot(rng, shape, reference_images[name] if name else None, noise) for name in labels]
+    scores = np.vstack([reference_bank.score_slots(slots[start:start + 8]) for start in range(0, len(slots), 8)])
+    return labels, scores
+
+
+def derive_tuning(names, labels, scores, margin=MATCH_TUNING_MARGIN, floor=MATCH_TUNING_FLOOR,
+                  ceiling=MATCH_THRESHOLD):
+    """Return {template name: {"threshold", "decisive", "impostor", "rival"}}, the last two
+    as [score, reference name] of the worst case."""
+    identities = [reference_identity(name) for name in names]
+    rows = {}
+    for row, label in enumerate(labels):
+        rows.setdefault(label, []).append(row)
+    tuning = {}
+    for j, name in enumerate(names):
+        # Rows showing something that must not be reported as this template
+        impostor_rows = [row for row, label in enumerate(labels)
+                         if label is None or reference_identity(label) != identities[j]]
+        row = impostor_rows[int(np.argmax(scores[impostor_rows, j]))]
+        impostor = (float(scores[row, j]), labels[row])
+        # Other templates scored on this template's own image
+        rival_columns = [k for k, identity in enumerate(identities) if identity != identities[j]]
+        own = scores[rows.get(name, [])][:, rival_columns]
+        if own.size:
+            row, column = np.unravel_index(int(np.argmax(own)), own.shape)
+            rival = (float(own[row, column]), names[rival_columns[column]])
+        else:
+            rival = (0.0, None)
+        threshold = float(np.clip(impostor[0] + margin, floor, ceiling))
+        decisive = min(1.0, max(threshold, max(impostor[0], rival[0]) + margin))
+        tuning[name] = {"threshold": round(threshold, 4), "decisive": round(decisive, 4),
+                        "impostor": [round(impostor[0], 4), impostor[1]], "rival": [round(rival[0], 4), rival[1]]}
+    return tuning
+
+
+def save_tuning(tuning, path=MATCH_TUNING_PATH):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(tuning, f, indent=2)
+
+
+def main():
+    from scanner import load_references
+
+    parser = argparse.ArgumentParser(description="Derive per-reference match thresholds from a confusion matrix.")
+    parser.add_argument("--rounds", type=int, default=3, help="noisy copies of every reference")
+    parser.add_argument("--noise", type=float, default=6.0, help="standard deviation of the pixel noise")
+    parser.add_argument("--show", type=int, default=10, help="number of most confusable templates to list")
+    parser.add_argument("--output", default=MATCH_TUNING_PATH)
+    args = parser.parse_args()
+
+    references = load_references()
+    bank = references.reference_bank
+    labels, scores = confusion_matrix(references.reference_images, bank, references.shape, args.rounds, args.noise)
+    tuning = derive_tuning(bank.names, labels, scores)
+    save_tuning(tuning, args.output)
+
+    print(f"{len(bank)} templates, {len(labels)} test slots; saved to {args.output}")
+    print(f"\n{'template':<30}{'threshold':>10}{'decisive':>10}  worst impostor / rival")
+    for name, entry in sorted(tuning.items(), key=lambda item: -item[1]["decisive"])[:args.show]:
+        print(f"{name:<30}{entry['threshold']:>10.3f}{entry['decisive']:>10.3f}  "
+              f"{entry['impostor'][1]} {entry['impostor'][0]:.3f} / {entry['rival'][1]} {entry['rival'][0]:.3f}")
+    thresholds = [entry["threshold"] for entry in tuning.values()]
+    print(f"\nthresholds {min(thresholds):.3f}-{max(thresholds):.3f} (global MATCH_THRESHOLD {MATCH_THRESHOLD}), "
+          f"{sum(entry['decisive'] < 1.0 for entry in tuning.values())} templates can end a search early")
+
+
+if __name__ == "__main__":
+    main()
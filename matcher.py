@@ -0,0 +1,281 @@
+import json
+import os
+from collections import Counter
+import cv2
+import numpy as np
+from config import AGENT_ALIASES, MATCH_TUNING_PATH
+
+
+class ReferenceBank:
+    """Reference templates packed into one contiguous, FFT-domain array for batched matching.
+
+    Every template is mean-subtracted per channel, divided by its norm and zero-padded
+    to the slot size, so scoring all slots against all templates is one batched
+    cross-correlation followed by a per-window variance normalisation. Scores are
+    the same TM_CCOEFF_NORMED maxima that cv2.matchTemplate + minMaxLoc return.
+    """
+
+    def __init__(self, references, slot_shape):
+        self.names = list(references)
+        self.height = cv2.getOptimalDFTSize(slot_shape[0])
+        self.width = cv2.getOptimalDFTSize(slot_shape[1])
+        self.sizes = np.array([references[name].shape[:2] for name in self.names], dtype=np.int32)
+
+        padded = np.zeros((len(self.names), self.height, self.width, 3), dtype=np.float32)
+        for k, name in enumerate(self.names):
+            template = references[name].astype(np.float32)
+            template -= template.mean(axis=(0, 1))
+            norm = np.sqrt(np.square(template, dtype=np.float64).sum())
+            h, w = template.shape[:2]
+            padded[k, :h, :w] = template / norm if norm > 0 else 0
+        # Conjugate spectra laid out channel-major: (3, templates, height, width // 2 + 1)
+        spectra = np.fft.rfft2(padded, axes=(1, 2))
+        self.spectra = np.ascontiguousarray(np.conj(spectra).transpose(3, 0, 1, 2))
+
+    def __len__(self):
+        return len(self.names)
+
+    def share(self):
+        """Copy the spectra into shared memory and return (handle, shm).
+
+        The handle is small and picklable; pass it to ReferenceBank.attach in another
+        process. The caller owns shm and must close() and unlink() it when done.
+        """
+        from multiprocessing import shared_memory  # Only batch runs share banks between processes
+        shm = shared_memory.SharedMemory(create=True, size=self.spectra.nbytes)
+        np.ndarray(self.spectra.shape, self.spectra.dtype, buffer=shm.buf)[...] = self.spectra
+        handle = {'names': self.names, 'height': self.height, 'width': self.width, 'sizes': self.sizes.tolist(),
+                  'shm_name': shm.name, 'shape': self.spectra.shape, 'dtype': self.spectra.dtype.str}
+        return handle, shm
+
+    @classmethod
+    def attach(cls, handle):
+        """Return a bank whose spectra are read directly from the shared memory named in handle."""
+        from multiprocessing import shared_memory
+        bank = cls.__new__(cls)
+        bank.names = handle['names']
+        bank.height = handle['height']
+        bank.width = handle['width']
+        bank.sizes = np.array(handle['sizes'], dtype=np.int32)
+        bank._shm = shared_memory.SharedMemory(name=handle['shm_name'])  # Keeps the mapping alive
+        bank.spectra = np.ndarray(handle['shape'], np.dtype(handle['dtype']), buffer=bank._shm.buf)
+        return bank
+
+    def score_slots(self, screen_areas):
+        """Return a (slots, templates) array with the best match score of every pair."""
+        slots = np.zeros((len(screen_areas), self.height, self.width, 3), dtype=np.float32)
+        for i, area in enumerate(screen_areas):
+            slots[i, :area.shape[0], :area.shape[1]] = area
+        area_spectra = np.fft.rfft2(slots, axes=(1, 2)).transpose(3, 0, 1, 2)
+
+        # Correlate every slot with every template, summing the colour channels in the frequency domain
+        product = area_spectra[0][:, None] * self.spectra[0][None]
+        product += area_spectra[1][:, None] * self.spectra[1][None]
+        product += area_spectra[2][:, None] * self.spectra[2][None]
+        numerators = np.fft.irfft2(product, s=(self.height, self.width), axes=(2, 3))
+
+        scores = np.zeros((len(screen_areas), len(self.names)), dtype=np.float64)
+        for i, area in enumerate(screen_areas):
+            area_height, area_width = area.shape[:2]
+            pixels = area.astype(np.float64)
+            sums = _integral(pixels)
+            square_sums = _integral(np.square(pixels).sum(axis=2))
+            for k, (h, w) in enumerate(self.sizes):
+                rows, cols = area_height - h + 1, area_width - w + 1
+                if rows <= 0 or cols <= 0:
+                    continue
+                n = h * w
+                window = _window_sums(sums, h, w, rows, cols)
+                variance = _window_sums(square_sums, h, w, rows, cols) - np.square(window).sum(axis=2) / n
+                valid = variance > 1e-6 * n
+                result = np.zeros((rows, cols))
+                result[valid] = numerators[i, k, :rows, :cols][valid] / np.sqrt(variance[valid])
+                scores[i, k] = min(result.max(), 1.0)
+        return scores
+
+    def top_k(self, screen_areas, k=1):
+        """Return, for each slot, the k best (name, score) pairs in descending order."""
+        scores = self.score_slots(screen_areas)
+        # Stable sort keeps the original reference order for ties
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        return [[(self.names[t], float(scores[i, t])) for t in row] for i, row in enumerate(order)]
+
+
+class PortraitMatcher:
+    """Identifies agents from one greyscale portrait per agent; selected vs locked is told apart by colour.
+
+    Each template is cut down to its portrait region (roi: top, bottom, left and right as
+    fractions of the template), leaving out the slot border and the role bar, and matched
+    in greyscale, where the blue selection overlay barely changes the score. The state is
+    then read from the tint of the matched window: how much bluer (mean blue minus mean
+    red) it is than the agent's locked portrait. With candidates set, every portrait is
+    first matched at prefilter_scale and only the best candidates are matched at full size.
+    """
+
+    def __init__(self, references, roi, tint_threshold, prefilter_scale=0.25, candidates=None):
+        self.names = list(references)  # Locked-state reference names, e.g. "jett.png"
+        self.templates = []
+        self.tints = []
+        top, bottom, left, right = roi
+        for name in self.names:
+            image = references[name]
+            height, width = image.shape[:2]
+            portrait = image[int(height * top):int(height * bottom), int(width * left):int(width * right)]
+            self.templates.append(cv2.cvtColor(portrait, cv2.COLOR_BGR2GRAY))
+            self.tints.append(_tint(portrait))
+        self.tint_threshold = tint_threshold
+        self.prefilter_scale = prefilter_scale
+        self.candidates = candidates
+        self.small_templates = [downscale(template, prefilter_scale) for template in self.templates]
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, screen_area, threshold):
+        """Return (reference name, score), the name prefixed with 'selected_' when the area shows the
+        selection overlay, or (None, 0) when no portrait reaches threshold."""
+        gray = cv2.cvtColor(screen_area, cv2.COLOR_BGR2GRAY)
+        shortlist = range(len(self.templates))
+        if self.candidates is not None and self.candidates < len(self.templates):
+            small_gray = downscale(gray, self.prefilter_scale)
+            coarse_scores = [match_template(small_gray, template)[0] for template in self.small_templates]
+            shortlist = np.argsort(coarse_scores)[::-1][:self.candidates]
+        best_score, best_k, best_location = 0.0, None, None
+        for k in shortlist:
+            score, location = match_template(gray, self.templates[k])
+            if score > best_score:
+                best_score, best_k, best_location = score, k, location
+        if best_k is None or best_score < threshold:
+            return None, 0
+        x, y = best_location
+        height, width = self.templates[best_k].shape
+        if _tint(screen_area[y:y + height, x:x + width]) - self.tints[best_k] >= self.tint_threshold:
+            return "selected_" + self.names[best_k], best_score
+        return self.names[best_k], best_score
+
+
+class PriorMatcher:
+    """Tries the most likely references first and stops at the first decisive score.
+
+    thresholds[name] is the score a reference needs to be accepted, decisive[name] the score
+    at which it stops the search and agents[name] the reference's agent. decisive comes from
+    synthetic crops (see match_tuning.py), so stopping there is a heuristic: on real screen
+    crops another reference can occasionally score higher, and the result then differs from
+    exhaustive matching. Each area tries its previous match, then that agent's other
+    references, then those of the most picked agents (pick_order) in the same state.
+    Areas without a decisive score go on through the shortlist callable's candidates (still
+    stopping at a decisive one) and keep the best accepted score.
+    comparison_counts counts matched areas by the number of comparisons they needed.
+    """
+
+    def __init__(self, references, thresholds, decisive, agents, popular=2, pick_order=()):
+        self.references = references
+        self.thresholds = thresholds
+        self.decisive = decisive
+        self.agents = agents
+        self.by_agent = {}
+        for name, agent in agents.items():
+            self.by_agent.setdefault(agent, []).append(name)
+        self.popular = popular
+        self.pick_order = list(pick_order)  # Agents, most picked first
+        self.comparison_counts = Counter()
+
+    def candidates(self, prior):
+        """Reference names to try first for an area whose previous match was prior (or None)."""
+        order = []
+        if prior in self.references:
+            order.append(prior)
+            order.extend(self.by_agent[self.agents[prior]])
+        selected = prior is None or prior.startswith("selected_")
+        for agent in self.pick_order[:self.popular]:
+            order.extend(name for name in self.by_agent.get(agent, ()) if name.startswith("selected_") == selected)
+        return list(dict.fromkeys(order))
+
+    def match_areas(self, screen_areas, priors, shortlist):
+        """Return (best_match, best_score) per area, or (None, 0) when nothing is accepted.
+
+        shortlist is called once with the areas that found no decisive match and returns a
+        list of candidate names for each.
+        """
+        results = [(None, 0)] * len(screen_areas)
+        tried = [{} for _ in screen_areas]  # {reference name: score} per area
+        undecided = []
+        for i, (screen_area, prior) in enumerate(zip(screen_areas, priors)):
+            for name in self.candidates(prior):
+                score = self._score(screen_area, name, i, tried)
+                if score >= self.decisive[name]:
+                    results[i] = (name, score)
+                    break
+            else:
+                undecided.append(i)
+        if undecided:
+            for i, names in zip(undecided, shortlist([screen_areas[i] for i in undecided])):
+                for name in names:
+                    if name not in tried[i] and self._score(screen_areas[i], name, i, tried) >= self.decisive[name]:
+                        break
+                best_score, best_match = max(((score, name) for name, score in tried[i].items()
+                                              if score >= self.thresholds[name]), default=(0, None))
+                results[i] = (best_match, best_score)
+        self.comparison_counts.update(len(scores) for scores in tried)
+        return results
+
+    def _score(self, screen_area, name, i, tried):
+        score = match_template(screen_area, self.references[name])[0]
+        tried[i][name] = score
+        return score
+
+
+def reference_identity(name):
+    """(agent, selected) for a reference name, e.g. ("brimstone", True) for "selected_brim_blue.png"."""
+    selected = name.startswith("selected_")
+    stem = os.path.splitext(name.replace("selected_", "", 1))[0].split("_")[0]
+    return AGENT_ALIASES.get(stem, stem), selected
+
+
+def load_tuning(path=MATCH_TUNING_PATH):
+    """Return {template name: (threshold, decisive)} written by match_tuning.py, or {} if it has not been run."""
+    try:
+        with open(path) as f:
+            return {name: (entry["threshold"], entry["decisive"]) for name, entry in json.load(f).items()}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def match_template(image, template):
+    """Best TM_CCOEFF_NORMED score of template in image and its top-left corner; 0 if it does not fit."""
+    if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+        return 0.0, (0, 0)
+    _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED))
+    return score, location
+
+
+def _tint(image):
+    """Mean blue minus mean red of a BGR image."""
+    blue, _, red, _ = cv2.mean(image)
+    return blue - red
+
+
+def downscale(image, scale):
+    """Resize an image by scale with area averaging, keeping at least one pixel per side."""
+    height, width = image.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def area_signature(screen_area):
+    """Cheap fingerprint of a screen area: a small greyscale thumbnail."""
+    gray = cv2.cvtColor(screen_area, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (16, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def _integral(values):
+    """Summed-area table with a leading row and column of zeros."""
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1) + values.shape[2:])
+    np.cumsum(values, axis=0, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+
+def _window_sums(table, h, w, rows, cols):
+    """Sum of every h x w window whose top-left corner lies in the rows x cols grid."""
+    return table[h:h + rows, w:w + cols] - table[:rows, w:w + cols] - table[h:h + rows, :cols] + table[:rows, :cols]
@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+from PIL import Image
+from config import AREA_PREVIEW_SIZE
+
+
+class PreviewBuffers:
+    """Reusable preview images for the GUI's area boxes.
+
+    Each area gets one preallocated RGBA buffer and a PIL image that shares its memory,
+    so a refresh is a colour conversion into the buffer (plus a bilinear resize for the
+    areas that are a pixel or two off the preview size) and no new image objects.
+    update() also keeps a copy of the last crop of each area and reports whether it
+    changed, so unchanged previews are not pushed to Tk again.
+    """
+
+    def __init__(self, count, size=AREA_PREVIEW_SIZE):
+        self.size = size
+        width, height = size
+        self.buffers = [np.zeros((height, width, 4), dtype=np.uint8) for _ in range(count)]
+        # PIL only shares memory with 4-byte pixel modes, hence RGBA rather than RGB
+        self.images = [Image.frombuffer("RGBA", size, buffer, "raw", "RGBA", 0, 1) for buffer in self.buffers]
+        self.last_areas = [None] * count
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+
+    def reset(self):
+        """Forget the last crops so the next update() reports every area as changed."""
+        self.last_areas = [None] * len(self.buffers)
+
+    def update(self, i, screen_area):
+        """Render a BGR screen area into preview i; returns False if it is identical to the last one."""
+        last = self.last_areas[i]
+        # cv2.norm compares without allocating the boolean array np.array_equal would
+        if last is not None and last.shape == screen_area.shape and cv2.norm(last, screen_area, cv2.NORM_INF) == 0:
+            return False
+        if last is None or last.shape != screen_area.shape:
+            self.last_areas[i] = last = np.empty_like(screen_area)
+        np.copyto(last, screen_area)
+        if screen_area.shape[1::-1] != self.size:
+            cv2.resize(screen_area, self.size, dst=self.resized, interpolation=cv2.INTER_LINEAR)
+            screen_area = self.resized
+        cv2.cvtColor(screen_area, cv2.COLOR_BGR2RGBA, dst=self.buffers[i])
+        return True
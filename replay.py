@@ -0,0 +1,95 @@
+"""Run the scanner headless over a recorded lobby (a video file or a folder of screenshots).
+
+Usage: python replay.py RECORDING [--interval SECONDS] [--output CSV] [--stop-when-locked]
+
+Frames are processed as fast as possible; times come from the recording, so the
+selection and confirmation times match what the GUI would have shown live.
+"""
+import argparse
+import os
+import time
+from collections import namedtuple
+from config import REPLAY_FRAME_INTERVAL
+from capture import create_source
+from scanner import ScanSession
+from export import CSV_HEADER, format_result_row, write_results_csv
+
+# results is the scanner output for the last scanned frame; start_time is the recording
+# time of the starting screen (None if it was never seen)
+ReplayResult = namedtuple('ReplayResult', ['path', 'results', 'frames', 'start_time', 'elapsed'])
+
+
+def replay_lobby(path, frame_interval=REPLAY_FRAME_INTERVAL, stop_when_locked=False, session=None,
+                 on_results=None):
+    """Stream every frame of a recording through a ScanSession and return a ReplayResult.
+
+    on_results, if given, is called with (frame, results) after each scanned frame. Video
+    frames are decoded into a FramePool, so a frame must not be kept past the callback.
+    """
+    session = session if session is not None else ScanSession()
+    source = create_source("replay", path=path, frame_interval=frame_interval)
+    start_time = None
+    results = []
+    frames = 0
+    started = time.perf_counter()
+    try:
+        for frame in source:
+            frames += 1
+            if start_time is None:
+                # Same flow as the live scanner: wait for the starting screen, then scan agents
+                if session.check_start_screen(frame):
+                    start_time = frame.timestamp
+                continue
+            results = session.scan(start_time, frame) or results
+            if on_results is not None:
+                on_results(frame, results)
+            if stop_when_locked and session.locked_count == len(session.areas):
+                break
+    finally:
+        source.close()
+    return ReplayResult(path, results, frames, start_time, time.perf_counter() - started)
+
+
+def print_results(replay):
+    print(f"{replay.path}: {replay.frames} frames in {replay.elapsed:.2f} s "
+          f"({replay.frames / max(replay.elapsed, 1e-9):.1f} frames/sec)")
+    if replay.start_time is None:
+        print("  Starting screen not detected")
+        return
+    print(f"  Starting screen at {replay.start_time:.2f} s")
+    print("  " + " | ".join(f"{column:>18}" for column in CSV_HEADER))
+    for result in replay.results:
+        print("  " + " | ".join(f"{value:>18}" for value in format_result_row(*result)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded agent select through the scanner.")
+    parser.add_argument("recording", help="video file or folder of full-screen screenshots")
+    parser.add_argument("--interval", type=float, default=REPLAY_FRAME_INTERVAL,
+                        help="seconds between screenshots when replaying a folder")
+    parser.add_argument("--output", help="write the final results to this CSV file")
+    parser.add_argument("--stop-when-locked", action="store_true",
+                        help="stop reading frames once every area is locked")
+    parser.add_argument("--verbose", action="store_true", help="print every change in the results")
+    args = parser.parse_args()
+
+    last_printed = []
+
+    def print_changes(frame, results):
+        if results != last_printed:
+            print(f"  [{frame.timestamp:8.2f} s] " + ", ".join(f"{agent_name}" for _, agent_name, _, _, _ in results))
+            last_printed[:] = results
+
+    replay = replay_lobby(args.recording, args.interval, args.stop_when_locked,
+                          on_results=print_changes if args.verbose else None)
+    print_results(replay)
+    if args.output and replay.results:
+        folder = os.path.dirname(args.output)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        write_results_csv(args.output, replay.results)
+        print(f"Exported to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from config import CAPTURE_BACKEND, SNAPSHOT_QUEUE_SIZE, AUTO_CALIBRATE
+from capture import create_source, screen_size, capture_region
+from scanner import ScanSession
+from calibration import use_layout, layout_for, calibrate, save_layout
+from asset_cache import load_start_image
+from scheduler import AdaptiveScheduler
+import telemetry
+
+# Immutable result of one scan tick. results is a tuple of
+# (area_num, agent_name, score, selection_time, confirmation_time) tuples.
+ScanSnapshot = namedtuple('ScanSnapshot', ['timestamp', 'start_time', 'start_score', 'results', 'frame', 'error'])
+
+
+def apply_layout(layout):
+    """Make layout the default for new sessions and captures.
+
+    References are kept per layout (see scanner.load_references), so sessions already
+    running on another layout keep their own templates.
+    """
+    use_layout(layout)
+
+
+def select_screen_layout(backend=CAPTURE_BACKEND):
+    """Activate the cached (or estimated) layout for the current screen resolution and return it."""
+    layout = layout_for(screen_size(backend))
+    apply_layout(layout)
+    return layout
+
+
+class ScanWorker(threading.Thread):
+    """Background thread that owns frame capture and a ScanSession and publishes ScanSnapshots.
+
+    The worker waits for the starting screen, then identifies agents; an AdaptiveScheduler
+    sets the cadence for each phase of the lobby. Snapshots go through a bounded queue; when
+    the consumer falls behind the oldest snapshot is dropped so the scan loop never blocks.
+    With a session_log and/or a live_feed, each lobby's slot transitions are queued on them
+    as they happen (the session must record events). Live sources capture into a FramePool
+    of FRAME_POOL_SIZE buffers, enough for max_snapshots queued frames plus the one the GUI
+    is rendering.
+
+    When capturing the live screen (no source_factory) the worker picks the layout for the
+    screen resolution. If that resolution has not been calibrated yet, it captures the
+    whole screen while waiting and calibrates on the first frame showing the starting
+    screen, then switches to the fixed capture region of the calibrated layout.
+    """
+
+    def __init__(self, session=None, source_factory=None, scheduler=None, max_snapshots=SNAPSHOT_QUEUE_SIZE,
+                 session_log=None, live_feed=None):
+        super().__init__(name="ScanWorker", daemon=True)
+        self.session = session if session is not None else ScanSession()
+        self.auto_layout = source_factory is None
+        self.source_factory = source_factory or (
+            lambda: create_source(CAPTURE_BACKEND, region=capture_region(self.session.areas, self.session.start_area)))
+        self.scheduler = scheduler if scheduler is not None else AdaptiveScheduler()
+        self.session_log = session_log
+        self.live_feed = live_feed
+        self.snapshots = queue.Queue(maxsize=max_snapshots)
+        self.start_time = None
+        self.calibrating = False
+        self.start_image = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        source = None
+        try:
+            if self.auto_layout:
+                layout = select_screen_layout()
+                self.session.use_layout(layout)
+                self.calibrating = AUTO_CALIBRATE and not layout.calibrated
+            # Create the source on this thread: some capture backends are bound to the creating thread
+            source = self.create_source()
+            full_screen = self.calibrating
+            deadline = time.perf_counter()
+            while not self._stop_event.is_set():
+                self.publish(self.scan_once(source))
+                if full_screen and not self.calibrating:
+                    # Calibrated: capture only the scan region from now on
+                    source.close()
+                    source = None
+                    source = self.create_source()
+                    full_screen = False
+                now = time.perf_counter()
+                deadline = self.scheduler.next_deadline(deadline, self.session, self.start_time is not None, now)
+                self._stop_event.wait(deadline - now)
+        except Exception as e:
+            # E.g. a missing or denied capture backend: report it instead of dying silently
+            self.publish(ScanSnapshot(time.perf_counter(), self.start_time, self.session.start_score, (), None,
+                                      f"Capture failed: {e}"))
+        finally:
+            if source is not None:
+                source.close()
+
+    def create_source(self):
+        if self.calibrating:
+            width, height = self.session.layout.resolution
+            return create_source(CAPTURE_BACKEND, region=(0, 0, width, height))
+        return self.source_factory()
+
+    def calibrate(self, frame):
+        """Look for the starting screen in a full-screen frame and switch to the calibrated layout if found."""
+        if self.start_image is None:
+            self.start_image = load_start_image()
+            if self.start_image is None:
+                self.calibrating = False
+                return
+        with telemetry.stage("calibrate"):
+            layout = calibrate(frame.image, self.start_image)
+        if layout is not None:
+            save_layout(layout)
+            apply_layout(layout)
+            self.session.use_layout(layout)
+            self.calibrating = False
+
+    def scan_once(self, source):
+        """Capture one frame, run the scanner on it and return the resulting snapshot."""
+        with telemetry.stage("scan tick"):
+            return self._scan_once(source)
+
+    def _scan_once(self, source):
+        frame = None
+        try:
+            with telemetry.stage("capture"):
+                frame = source.grab()
+            if frame is None:
+                self._stop_event.set()
+                return ScanSnapshot(time.perf_counter(), self.start_time, self.session.start_score, (), None,
+                                    "Frame source exhausted")
+            if self.start_time is None:
+                if self.calibrating:
+                    self.calibrate(frame)
+                if self.session.check_start_screen(frame):
+                    self.start_time = frame.timestamp
+                    # The lobby has started, so stop waiting for a calibration (it may have found no match)
+                    # and switch to the scan region of the current layout
+                    self.calibrating = False
+                    lobby = self.session_log.start_lobby() if self.session_log is not None else None
+                    if self.live_feed is not None:
+                        self.live_feed.start_lobby(lobby)
+                results = ()
+            else:
+                results = tuple(self.session.scan(self.start_time, frame) or ())
+                events = self.session.drain_events()
+                if self.session_log is not None:
+                    self.session_log.log(events)
+                if self.live_feed is not None:
+                    self.live_feed.publish(events)
+            return ScanSnapshot(frame.timestamp, self.start_time, self.session.start_score, results, frame, None)
+        except Exception as e:
+            return ScanSnapshot(time.perf_counter(), self.start_time, self.session.start_score, (), frame, str(e))
+
+    def publish(self, snapshot):
+        """Put a snapshot on the queue, dropping the oldest one if the queue is full."""
+        while True:
+            try:
+                self.snapshots.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def latest(self):
+        """Return the newest snapshot published since the last call, or None."""
+        snapshot = None
+        while True:
+            try:
+                snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return snapshot
+
+    def stop(self, timeout=1.0):
+        """Ask the worker to finish its current tick and wait for it."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
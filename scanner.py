@@ -1,55 +1,185 @@
-import pyautogui
+import os
 import cv2
 import numpy as np
-import time
-import os
-from config import AREAS, DEFAULT_IMAGE_FOLDER, SELECTED_IMAGE_FOLDER, START_SCREEN_FOLDER, MATCH_THRESHOLD, MAX_WIDTH, \
-    MAX_HEIGHT, START_AREA, START_THRESHOLD, AGENT_ROLES
-
-# Load reference images into memory and resize if necessary
-reference_images = {}
-# Load default state images
-DEFAULT_IMAGES = [f for f in os.listdir(DEFAULT_IMAGE_FOLDER) if f.endswith(('.png', '.jpg', '.jpeg'))]
-for agent_image in DEFAULT_IMAGES:
-    img = cv2.imread(os.path.join(DEFAULT_IMAGE_FOLDER, agent_image))
-    height, width = img.shape[:2]
-    if width > MAX_WIDTH or height > MAX_HEIGHT:
-        scale = min(MAX_WIDTH / width, MAX_HEIGHT / height)
-        new_width = int(width * scale)
-        new_height = int(height * scale)
-        img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    reference_images[agent_image] = img
-
-# Load selected state images
-SELECTED_IMAGES = [f for f in os.listdir(SELECTED_IMAGE_FOLDER) if f.endswith(('.png', '.jpg', '.jpeg'))]
-for agent_image in SELECTED_IMAGES:
-    img = cv2.imread(os.path.join(SELECTED_IMAGE_FOLDER, agent_image))
-    height, width = img.shape[:2]
-    if width > MAX_WIDTH or height > MAX_HEIGHT:
-        scale = min(MAX_WIDTH / width, MAX_HEIGHT / height)
-        new_width = int(width * scale)
-        new_height = int(height * scale)
-        img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    reference_images[f"selected_{agent_image}"] = img  # Prefix to distinguish
-
-# Load starting screen reference image
-START_IMAGES = [f for f in os.listdir(START_SCREEN_FOLDER) if f.endswith(('.png', '.jpg', '.jpeg'))]
-start_reference = None
-if START_IMAGES:
-    start_img = cv2.imread(os.path.join(START_SCREEN_FOLDER, START_IMAGES[0]))
-    height, width = start_img.shape[:2]
-    if width > START_AREA[2] or height > START_AREA[3]:
-        scale = min(START_AREA[2] / width, START_AREA[3] / height)
-        new_width = int(width * scale)
-        new_height = int(height * scale)
-        start_img = cv2.resize(start_img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    start_reference = start_img
+from config import MATCH_THRESHOLD, MATCH_ENGINE, INCREMENTAL_SCAN, CHANGE_THRESHOLD, SLOT_TRACKING, PREFILTER_SCALE, \
+    PREFILTER_CANDIDATES, EVENT_TIME_MIDPOINT, IDLE_SCAN_INTERVAL, AGENT_ALIASES, PORTRAIT_ROI, MASKED_MATCH_THRESHOLD, \
+    SELECTED_TINT_THRESHOLD, EARLY_EXIT_SCORE, PRIOR_POPULAR_AGENTS, ANALYTICS_DB_PATH
+from capture import Frame, create_source
+from matcher import ReferenceBank, PortraitMatcher, PriorMatcher, downscale, area_signature, load_tuning, \
+    reference_identity
+from asset_cache import load_reference_assets
+from calibration import active_layout
+from start_detector import StartScreenDetector
+from slot_tracker import SlotTracker
+import telemetry
+
+def area_shape(areas):
+    """(height, width) large enough for every area."""
+    return max(h for _, _, _, h in areas), max(w for _, _, w, _ in areas)
+
+def agent_portraits(reference_images):
+    """One locked-state reference per agent ({reference name: image}), preferring the file named after the agent."""
+    portraits = {}
+    for name in sorted(reference_images):
+        if name.startswith("selected_"):
+            continue
+        stem = os.path.splitext(name)[0]
+        agent = AGENT_ALIASES.get(stem, stem)
+        if agent not in portraits or stem == agent:
+            portraits[agent] = name
+    return {name: reference_images[name] for name in portraits.values()}
+
+def pick_order_from_history(path=ANALYTICS_DB_PATH):
+    """Agents by how often they were picked in the analytics store, most picked first ([] without history)."""
+    if not os.path.exists(path):
+        return []
+    from analytics_store import AnalyticsStore  # Only the prior engine reads the history
+    store = AnalyticsStore(path)
+    try:
+        return list(dict.fromkeys(reference_identity(agent)[0] for agent, _, _ in store.agent_frequency()))
+    finally:
+        store.close()
+
+def build_prior_matcher(reference_images, tuning=None, pick_order=None):
+    """PriorMatcher for the references, with the saved match tuning and pick history unless given."""
+    if tuning is None:
+        tuning = load_tuning()
+    if pick_order is None:
+        pick_order = pick_order_from_history()
+    untuned = (MATCH_THRESHOLD, EARLY_EXIT_SCORE)
+    return PriorMatcher(reference_images,
+                        {name: tuning.get(name, untuned)[0] for name in reference_images},
+                        {name: tuning.get(name, untuned)[1] for name in reference_images},
+                        {name: reference_identity(name)[0] for name in reference_images},
+                        PRIOR_POPULAR_AGENTS, pick_order)
+
+class ReferenceSet:
+    """Reference images plus the banks built from them for matching.
+
+    The banks are sized for the areas of the active layout unless shape is given. Each one
+    is built the first time an engine asks for it, so only the configured engine's bank
+    costs startup time.
+    start_variants holds every starting screen image ({name: image}); by default just start_reference.
+    """
+
+    def __init__(self, reference_images, start_reference, reference_bank=None, coarse_bank=None, shape=None,
+                 start_variants=None):
+        self.reference_images = reference_images
+        self.start_reference = start_reference
+        if start_variants is None:
+            start_variants = {"start": start_reference} if start_reference is not None else {}
+        self.start_variants = start_variants
+        self.shape = shape if shape is not None else area_shape(active_layout().areas)
+        self._reference_bank = reference_bank
+        self._coarse_bank = coarse_bank
+        self._portrait_matcher = None
+        self._prior_matcher = None
+
+    @property
+    def reference_bank(self):
+        """The reference images packed for batched matching of all areas at once."""
+        if self._reference_bank is None:
+            self._reference_bank = ReferenceBank(self.reference_images, self.shape)
+        return self._reference_bank
+
+    @property
+    def coarse_bank(self):
+        """Low-resolution copy used to shortlist candidates before full-resolution matching."""
+        if self._coarse_bank is None:
+            height, width = self.shape
+            self._coarse_bank = ReferenceBank(
+                {name: downscale(img, PREFILTER_SCALE) for name, img in self.reference_images.items()},
+                (int(height * PREFILTER_SCALE) + 1, int(width * PREFILTER_SCALE) + 1))
+        return self._coarse_bank
+
+    @property
+    def portrait_matcher(self):
+        """Greyscale portraits for the "masked" engine, one per agent."""
+        if self._portrait_matcher is None:
+            self._portrait_matcher = PortraitMatcher(agent_portraits(self.reference_images), PORTRAIT_ROI,
+                                                     SELECTED_TINT_THRESHOLD, PREFILTER_SCALE, PREFILTER_CANDIDATES)
+        return self._portrait_matcher
+
+    @property
+    def prior_matcher(self):
+        """Tuned thresholds and candidate order for the "prior" engine."""
+        if self._prior_matcher is None:
+            self._prior_matcher = build_prior_matcher(self.reference_images)
+        return self._prior_matcher
+
+    @prior_matcher.setter
+    def prior_matcher(self, prior_matcher):
+        self._prior_matcher = prior_matcher
+
+    def share(self):
+        """Put the matching banks in shared memory; return (handle, shared memory blocks to release)."""
+        bank_handle, bank_shm = self.reference_bank.share()
+        coarse_handle, coarse_shm = self.coarse_bank.share()
+        return {'reference_bank': bank_handle, 'coarse_bank': coarse_handle}, [bank_shm, coarse_shm]
+
+# Reference sets per layout geometry, {(scale, areas): ReferenceSet}, loaded from the asset cache on first use
+_references = {}
+
+def _references_key(layout, areas=None):
+    return layout.scale, tuple(tuple(area) for area in (areas if areas is not None else layout.areas))
+
+def load_references(layout=None, areas=None):
+    """Return the ReferenceSet for a layout (the active one by default), loading it on first use.
+
+    Templates are scaled for the layout and the banks sized for its areas (or the given
+    ones), so sessions on different layouts in one process never share templates.
+    """
+    layout = layout or active_layout()
+    key = _references_key(layout, areas)
+    references = _references.get(key)
+    if references is None:
+        assets = load_reference_assets(layout)
+        references = _references[key] = ReferenceSet(assets['templates'], assets['start'], shape=area_shape(key[1]),
+                                                      start_variants=assets['start_variants'])
+    return references
+
+def set_references(references, layout=None):
+    """Replace the ReferenceSet used for a layout, the active one by default (e.g. with an extended roster
+    for benchmarks). None makes the next load_references() for the layout rebuild it.
+    """
+    key = _references_key(layout or active_layout())
+    if references is None:
+        _references.pop(key, None)
+    else:
+        _references[key] = references
+
+def use_shared_references(handle):
+    """Use banks shared by another process (see ReferenceSet.share) instead of building them here.
+
+    The reference images themselves are memory-mapped from the asset cache, so nothing is decoded.
+    """
+    assets = load_reference_assets()
+    set_references(ReferenceSet(assets['templates'], assets['start'], ReferenceBank.attach(handle['reference_bank']),
+                                ReferenceBank.attach(handle['coarse_bank']), start_variants=assets['start_variants']))
+
+def __getattr__(name):
+    # Lazy module attributes: scanner.reference_images, scanner.start_reference, scanner.reference_bank, ...
+    if name in ('reference_images', 'start_reference', 'reference_bank', 'coarse_bank', 'portrait_matcher',
+                'prior_matcher'):
+        return getattr(load_references(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Frame source used when no frame is passed in, created on first use
+_default_source = None
+
+def grab_frame():
+    """Capture one frame covering all scanned areas from the default frame source."""
+    global _default_source
+    if _default_source is None:
+        _default_source = create_source()
+    return _default_source.grab()
 
 def capture_screen_area(x, y, width, height, full_screen=None):
-    """Capture a specific area of the screen or crop from a full screen capture."""
+    """Capture a specific area of the screen or crop from a Frame / full screen capture."""
     if full_screen is None:
-        screenshot = pyautogui.screenshot()
-        full_screen = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        full_screen = grab_frame()
+    if isinstance(full_screen, Frame):
+        return full_screen.crop(x, y, width, height)
     return full_screen[y:y + height, x:x + width]
 
 def compare_images(screen_area, reference_img):
@@ -58,120 +188,286 @@ def compare_images(screen_area, reference_img):
     _, max_val, _, _ = cv2.minMaxLoc(result)
     return max_val
 
-# Initialize global dictionaries if not already set
-if 'detection_times' not in globals():
-    detection_times = {i: None for i in range(1, 6)}  # Initial selection time
-if 'confirmation_times' not in globals():
-    confirmation_times = {i: None for i in range(1, 6)}  # Confirmation time
-if 'last_detected_agents' not in globals():
-    last_detected_agents = {i: None for i in range(1, 6)}  # Last detected agent
-if 'locked_agents' not in globals():
-    locked_agents = {i: None for i in range(1, 6)}  # Locked (confirmed) agents
-if 'last_update_times' not in globals():
-    last_update_times = {i: 0 for i in range(1, 6)}  # Last update time for debounce
-if 'start_screen_confirmed' not in globals():
-    start_screen_confirmed = False  # Flag to stop further starting screen checks
+def best_reference(screen_area, agent_names=None, references=None):
+    """Compare the area with each named reference image (all by default) and return (best_match, best_score).
 
-def reset_scanner_state():
-    """Reset all scanner-related global state variables."""
-    global detection_times, confirmation_times, last_detected_agents, locked_agents, last_update_times, start_screen_confirmed
-    detection_times = {i: None for i in range(1, 6)}
-    confirmation_times = {i: None for i in range(1, 6)}
-    last_detected_agents = {i: None for i in range(1, 6)}
-    locked_agents = {i: None for i in range(1, 6)}
-    last_update_times = {i: 0 for i in range(1, 6)}
-    start_screen_confirmed = False
-    # Reset function-specific attributes
-    if hasattr(scan_and_identify_agents, 'captured_start_screen_area'):
-        scan_and_identify_agents.captured_start_screen_area = None
-    if hasattr(scan_and_identify_agents, 'start_score'):
-        scan_and_identify_agents.start_score = 0.0
-
-def scan_and_identify_agents(start_time=None):
-    """Scan the five areas and identify agents by comparing to reference images, tracking selection and confirmation times.
-    Returns None if starting screen not detected initially, otherwise returns agent results."""
-    global detection_times, confirmation_times, last_detected_agents, locked_agents, last_update_times, start_screen_confirmed
-
-    # Initialize function-specific attributes if not set
-    if not hasattr(scan_and_identify_agents, 'captured_start_screen_area'):
-        scan_and_identify_agents.captured_start_screen_area = None
-    if not hasattr(scan_and_identify_agents, 'start_score'):
-        scan_and_identify_agents.start_score = 0.0
-
-    # Capture full screen once
-    full_screen = pyautogui.screenshot()
-    full_screen = cv2.cvtColor(np.array(full_screen), cv2.COLOR_RGB2BGR)
-
-    # Check starting screen only if not already confirmed
-    if not start_screen_confirmed and start_reference is not None:
-        start_screen_area = capture_screen_area(*START_AREA, full_screen=full_screen)
-        start_score = compare_images(start_screen_area, start_reference)
-        scan_and_identify_agents.start_score = start_score  # Store the confidence score
-        scan_and_identify_agents.captured_start_screen_area = start_screen_area  # Store the captured area
-        if start_score < START_THRESHOLD:
-            return None  # Do not proceed if starting screen not detected
+    references is the ReferenceSet to use, that of the active layout by default.
+    """
+    best_match = None
+    best_score = 0
+    # Compare with both default and selected state images
+    for agent_name, ref_img in (references or load_references()).reference_images.items():
+        if agent_names is not None and agent_name not in agent_names:
+            continue
+        score = compare_images(screen_area, ref_img)
+        if score > best_score and score >= MATCH_THRESHOLD:
+            best_score = score
+            best_match = agent_name
+    return best_match, best_score
+
+def match_threshold(engine=MATCH_ENGINE):
+    """Score an engine needs for a match; masked greyscale scores run lower than colour ones."""
+    return MASKED_MATCH_THRESHOLD if engine == "masked" else MATCH_THRESHOLD
+
+def _coarse_shortlist(screen_areas, references):
+    """Names of the PREFILTER_CANDIDATES best references for each area, matched at low resolution."""
+    small_areas = [downscale(screen_area, PREFILTER_SCALE) for screen_area in screen_areas]
+    return [[agent_name for agent_name, _ in candidates]
+            for candidates in references.coarse_bank.top_k(small_areas, k=PREFILTER_CANDIDATES)]
+
+def identify_areas(screen_areas, engine=MATCH_ENGINE, priors=None, references=None):
+    """Return (best_match, best_score) for each screen area, or (None, 0) when nothing reaches the match threshold.
+
+    priors are the areas' previous matches, which the "prior" engine tries first. references
+    is the ReferenceSet to match against, that of the active layout by default.
+    """
+    if references is None:
+        references = load_references()
+    matches = []
+    if engine == "prior":
+        matches = references.prior_matcher.match_areas(screen_areas, priors or [None] * len(screen_areas),
+                                                       lambda areas: _coarse_shortlist(areas, references))
+    elif engine == "masked":
+        portrait_matcher = references.portrait_matcher
+        matches = [portrait_matcher.match(screen_area, MASKED_MATCH_THRESHOLD) for screen_area in screen_areas]
+    elif engine == "batched":
+        for (agent_name, score), in references.reference_bank.top_k(screen_areas, k=1):
+            if score >= MATCH_THRESHOLD:
+                matches.append((agent_name, score))
+            else:
+                matches.append((None, 0))
+    elif engine == "coarse":
+        # Shortlist candidates at low resolution, then confirm them at full resolution
+        for screen_area, candidates in zip(screen_areas, _coarse_shortlist(screen_areas, references)):
+            matches.append(best_reference(screen_area, set(candidates), references))
+    else:
+        matches = [best_reference(screen_area, references=references) for screen_area in screen_areas]
+    return matches
+
+def _elapsed(timestamp, start_time):
+    """Seconds from start_time to timestamp, or None if the timestamp is not set (NaN)."""
+    return None if np.isnan(timestamp) else float(timestamp - start_time)
+
+def _display_name(agent_name):
+    """Strip the 'selected_' prefix and '.png' extension from a reference image name."""
+    return agent_name.replace("selected_", "").replace(".png", "")
+
+class ScanSession:
+    """Tracking state for one lobby: starting screen detection plus per-area selection and lock times.
+
+    Each session keeps its own layout, references and state, so independent sessions (a live
+    scan, several replays, even at different resolutions) can run side by side in one process.
+    Per-area times live in float arrays (NaN when unset) and names in small lists.
+    tracking picks how matches become selections and locks: "voting" (a SlotTracker per
+    area, see slot_tracker.py) or "legacy" (first match locks, 1 s selection debounce).
+    engine is the matching engine passed to identify_areas. With record_events, every
+    hover, selection and lock is also queued as an (event, area index, agent, score,
+    seconds since start) tuple until drain_events().
+    """
+
+    __slots__ = ('layout', 'areas', 'start_area', 'detection_times', 'confirmation_times', 'last_update_times',
+                 'last_detected_agents', 'locked_agents', 'last_matches', 'area_signatures', 'has_signature',
+                 'start_screen_confirmed', 'start_score', 'start_detector', 'last_change_time',
+                 'last_frame_time', 'events', 'tracking', 'trackers', 'engine')
+
+    def __init__(self, areas=None, record_events=False, start_area=None, tracking=SLOT_TRACKING, engine=MATCH_ENGINE):
+        layout = active_layout()
+        self.layout = layout
+        self.areas = list(areas or layout.areas)
+        self.start_area = start_area or layout.start_area
+        self.events = [] if record_events else None
+        self.tracking = tracking
+        self.engine = engine
+        self.start_detector = None  # Built from the references on the first check
+        self.reset()
+
+    def use_layout(self, layout):
+        """Scan the areas of a (re)calibrated layout from now on."""
+        self.layout = layout
+        self.areas = list(layout.areas)
+        self.start_area = layout.start_area
+
+    def reset(self):
+        """Forget all detections and wait for the starting screen again."""
+        count = len(self.areas)
+        self.detection_times = np.full(count, np.nan)  # Initial selection time
+        self.confirmation_times = np.full(count, np.nan)  # Confirmation time
+        self.last_update_times = np.full(count, -np.inf)  # Last update time for debounce
+        self.last_detected_agents = [None] * count  # Last detected agent
+        self.locked_agents = [None] * count  # Locked (confirmed) agents
+        self.last_matches = [(None, 0)] * count  # Last (best_match, best_score) per area
+        self.area_signatures = np.zeros((count, 16, 16), dtype=np.int16)  # Thumbnail of the last matched area
+        self.has_signature = np.zeros(count, dtype=bool)
+        self.start_screen_confirmed = False  # Flag to stop further starting screen checks
+        self.start_score = 0.0
+        if self.start_detector is not None:
+            self.start_detector.reset()
+        self.last_change_time = -np.inf  # Frame time when an unlocked area last changed
+        self.last_frame_time = None  # Time of the previously scanned frame
+        self.trackers = [SlotTracker(threshold=match_threshold(self.engine)) for _ in range(count)] \
+            if self.tracking == "voting" else None
+        if self.events is not None:
+            self.events.clear()
+
+    @property
+    def references(self):
+        """The ReferenceSet for this session's layout scale and areas."""
+        return load_references(self.layout, self.areas)
+
+    @property
+    def locked_count(self):
+        return sum(agent is not None for agent in self.locked_agents)
+
+    def drain_events(self):
+        """Return the slot transitions recorded since the last call and forget them."""
+        if not self.events:
+            return []
+        events = self.events
+        self.events = []
+        return events
+
+    def _record(self, event, i, agent_name, score, event_time, start_time):
+        if self.events is not None:
+            self.events.append((event, i, agent_name, float(score), event_time - start_time))
+
+    def area_changed(self, i, screen_area):
+        """Return True if area i differs from the one last matched, remembering it if so."""
+        signature = area_signature(screen_area)
+        if self.has_signature[i] and np.abs(signature - self.area_signatures[i]).mean() <= CHANGE_THRESHOLD:
+            return False
+        self.area_signatures[i] = signature
+        self.has_signature[i] = True
+        return True
+
+    def check_start_screen(self, frame):
+        """Match the starting screen box against the starting screen variants; return True once one has been seen.
+
+        The detector's confidence history is available as start_detector.history.
+        """
+        start_variants = self.references.start_variants
+        if not self.start_screen_confirmed and start_variants:
+            if self.start_detector is None or self.start_detector.variants is not start_variants:
+                self.start_detector = StartScreenDetector(start_variants)  # New references, e.g. after calibration
+            start_screen_area = capture_screen_area(*self.start_area, full_screen=frame)
+            with telemetry.stage("start screen"):
+                if self.start_detector.detect(start_screen_area, getattr(frame, "timestamp", None)):
+                    self.start_screen_confirmed = True  # Set flag to stop further checks
+            self.start_score = self.start_detector.score  # Store the confidence score
+        return self.start_screen_confirmed or not start_variants
+
+    def scan(self, start_time=None, frame=None):
+        """Scan the areas and identify agents by comparing to reference images, tracking selection and confirmation times.
+        Uses the given Frame (or captures one) and its timestamp as the current time.
+        Returns None if starting screen not detected initially, otherwise returns agent results."""
+        # Capture the scan region once
+        if frame is None:
+            frame = grab_frame()
+
+        # Do not proceed if starting screen not detected
+        if not self.check_start_screen(frame):
+            return None
+
+        # Proceed with agent scanning only if start_time is set and starting screen was initially detected
+        if start_time is None:
+            return None
+
+        agent_results = []
+        current_time = frame.timestamp
+        # A change seen now happened after the previous frame; record the midpoint of that gap
+        event_time = current_time
+        if EVENT_TIME_MIDPOINT and self.last_frame_time is not None \
+                and 0 < current_time - self.last_frame_time <= IDLE_SCAN_INTERVAL:
+            event_time = (self.last_frame_time + current_time) / 2
+        self.last_frame_time = current_time
+        detection_times = self.detection_times
+        confirmation_times = self.confirmation_times
+        last_detected_agents = self.last_detected_agents
+        locked_agents = self.locked_agents
+
+        screen_areas = [capture_screen_area(x, y, width, height, full_screen=frame) for x, y, width, height in self.areas]
+        # Only match areas that have changed since they were last matched; with legacy tracking
+        # locks are final, so locked areas are skipped too
+        if INCREMENTAL_SCAN:
+            pending = [i for i, screen_area in enumerate(screen_areas)
+                       if (locked_agents[i] is None or self.trackers is not None) and self.area_changed(i, screen_area)]
         else:
-            start_screen_confirmed = True  # Set flag to stop further checks
-
-    # Proceed with agent scanning only if start_time is set and starting screen was initially detected
-    if start_time is None:
-        return None
-
-    agent_results = []
-    current_time = time.perf_counter()
-
-    for i, (x, y, width, height) in enumerate(AREAS):
-        screen_area = capture_screen_area(x, y, width, height, full_screen=full_screen)
-
-        best_match = None
-        best_score = 0
-
-        # Compare with both default and selected state images
-        for agent_name, ref_img in reference_images.items():
-            score = compare_images(screen_area, ref_img)
-            if score > best_score and score >= MATCH_THRESHOLD:
-                best_score = score
-                best_match = agent_name
-
-        # Adjust agent name to remove 'selected_' prefix and '.png' extension
-        display_name = best_match.replace("selected_", "").replace(".png", "").lower() if best_match else "Unknown"
-
-        # Calculate selection and confirmation times
-        selection_time = detection_times[i + 1] - start_time if detection_times[i + 1] is not None else None
-        confirmation_time = confirmation_times[i + 1] - start_time if confirmation_times[i + 1] is not None else None
-
-        if locked_agents[i + 1] is not None:
-            # If locked, use the locked agent and times, ignoring new matches
-            display_name = locked_agents[i + 1].replace("selected_", "").replace(".png", "")
-            selection_time = detection_times[i + 1] - start_time if detection_times[i + 1] is not None else None
-            confirmation_time = confirmation_times[i + 1] - start_time if confirmation_times[
-                                                                              i + 1] is not None else None
-        elif best_match:
-            if "selected_" in best_match:  # Selected state
-                if last_detected_agents[i + 1] != best_match:  # Update only if agent changes
-                    # Debounce: Update only if 1 second has passed since last update
-                    if current_time - last_update_times[i + 1] >= 1.0:
-                        detection_times[i + 1] = current_time
-                        selection_time = detection_times[i + 1] - start_time
-                        last_detected_agents[i + 1] = best_match  # Update last detected agent
-                        last_update_times[i + 1] = current_time
-            elif "selected_" not in best_match:  # Confirmed state
-                if detection_times[i + 1] is None:  # No selection time yet
-                    detection_times[i + 1] = current_time
-                    confirmation_times[i + 1] = current_time
-                    selection_time = detection_times[i + 1] - start_time
-                    confirmation_time = confirmation_times[i + 1] - start_time
-                    locked_agents[i + 1] = best_match  # Lock the agent
-                elif confirmation_times[i + 1] is None or last_detected_agents[
-                    i + 1] != best_match:  # Update confirmation
-                    confirmation_times[i + 1] = current_time
-                    confirmation_time = confirmation_times[i + 1] - start_time
-                    if detection_times[i + 1] is None:  # No selection time, use confirmation time
-                        detection_times[i + 1] = current_time
-                        selection_time = detection_times[i + 1] - start_time
-                    locked_agents[i + 1] = best_match  # Lock the agent
-                last_detected_agents[i + 1] = best_match  # Update last detected agent
-
-        agent_results.append((i + 1, display_name, best_score, selection_time, confirmation_time))
-
-    return agent_results
\ No newline at end of file
+            pending = range(len(screen_areas))
+        if pending:
+            with telemetry.stage("match"):
+                # The previous match (or, once it is lost, the last selection or lock) is the likeliest
+                priors = [self.last_matches[i][0] or last_detected_agents[i] for i in pending]
+                matches = identify_areas([screen_areas[i] for i in pending], self.engine, priors, self.references)
+            for i, match in zip(pending, matches):
+                # Incremental scans only match areas that changed; otherwise compare the matches
+                if (INCREMENTAL_SCAN or match[0] != self.last_matches[i][0]) and locked_agents[i] is None:
+                    self.last_change_time = current_time
+                if match[0] is not None and match[0] != self.last_matches[i][0]:
+                    self._record("hover", i, match[0], match[1], event_time, start_time)
+                self.last_matches[i] = match
+
+        for i, (best_match, best_score) in enumerate(self.last_matches):
+            # Adjust agent name to remove 'selected_' prefix and '.png' extension
+            display_name = _display_name(best_match).lower() if best_match else "Unknown"
+
+            if self.trackers is not None:
+                # Every tick is a vote for the area's current match, including unchanged areas
+                self._vote(i, best_match, best_score, event_time, start_time)
+                if locked_agents[i] is not None:
+                    display_name = _display_name(locked_agents[i])
+            elif locked_agents[i] is not None:
+                # If locked, use the locked agent and times, ignoring new matches
+                display_name = _display_name(locked_agents[i])
+            elif best_match:
+                if "selected_" in best_match:  # Selected state
+                    if last_detected_agents[i] != best_match:  # Update only if agent changes
+                        # Debounce: Update only if 1 second has passed since last update
+                        if current_time - self.last_update_times[i] >= 1.0:
+                            detection_times[i] = event_time
+                            last_detected_agents[i] = best_match  # Update last detected agent
+                            self.last_update_times[i] = current_time
+                            self._record("select", i, best_match, best_score, event_time, start_time)
+                else:  # Confirmed state
+                    if np.isnan(detection_times[i]):  # No selection time yet
+                        detection_times[i] = event_time
+                        confirmation_times[i] = event_time
+                        locked_agents[i] = best_match  # Lock the agent
+                        self._record("lock", i, best_match, best_score, event_time, start_time)
+                    elif np.isnan(confirmation_times[i]) or last_detected_agents[i] != best_match:  # Update confirmation
+                        confirmation_times[i] = event_time
+                        locked_agents[i] = best_match  # Lock the agent
+                        self._record("lock", i, best_match, best_score, event_time, start_time)
+                    last_detected_agents[i] = best_match  # Update last detected agent
+
+            # Calculate selection and confirmation times
+            selection_time = _elapsed(detection_times[i], start_time)
+            confirmation_time = _elapsed(confirmation_times[i], start_time)
+            agent_results.append((i + 1, display_name, best_score, selection_time, confirmation_time))
+
+        return agent_results
+
+    def _vote(self, i, best_match, best_score, event_time, start_time):
+        """Feed area i's match to its SlotTracker and apply any selection or lock it decides on."""
+        transition = self.trackers[i].observe(best_match, best_score, event_time)
+        if transition is None:
+            return
+        event, agent_name, score, transition_time = transition
+        if event == "select":
+            self.detection_times[i] = transition_time
+        else:
+            if np.isnan(self.detection_times[i]):  # Locked without a selection seen first
+                self.detection_times[i] = transition_time
+            self.confirmation_times[i] = transition_time
+            self.locked_agents[i] = agent_name
+        self.last_detected_agents[i] = agent_name
+        self._record(event, i, agent_name, score, transition_time, start_time)
+
+# Session used by the module-level helpers below
+default_session = ScanSession()
+
+def reset_scanner_state():
+    """Reset the default scan session."""
+    default_session.reset()
+
+def scan_and_identify_agents(start_time=None, frame=None):
+    """Scan with the default session; see ScanSession.scan."""
+    return default_session.scan(start_time, frame)
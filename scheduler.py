@@ -0,0 +1,44 @@
+from config import START_CHECK_INTERVAL, SCAN_INTERVAL, ACTIVE_SCAN_INTERVAL, IDLE_SCAN_INTERVAL, SETTLE_TIME
+
+WAITING = "waiting"  # Starting screen not seen yet
+ACTIVE = "active"  # An unlocked area changed within the last SETTLE_TIME seconds
+SETTLED = "settled"  # Areas still unlocked but not changing
+IDLE = "idle"  # Every area is locked
+
+
+class AdaptiveScheduler:
+    """Picks the scan cadence from the lobby phase and keeps ticks on a drift-free grid.
+
+    Polls slowly while waiting for the starting screen, fast while unlocked areas are
+    changing (so selection and confirmation times are sampled finely), at the normal rate
+    while players hover, and rarely once everyone is locked. When a tick overruns its
+    deadline the missed ticks are skipped instead of being run back to back.
+    """
+
+    def __init__(self, start_interval=START_CHECK_INTERVAL, active_interval=ACTIVE_SCAN_INTERVAL,
+                 settled_interval=SCAN_INTERVAL, idle_interval=IDLE_SCAN_INTERVAL, settle_time=SETTLE_TIME):
+        self.intervals = {WAITING: start_interval, ACTIVE: active_interval, SETTLED: settled_interval,
+                          IDLE: idle_interval}
+        self.settle_time = settle_time
+        self.skipped_ticks = 0
+
+    def phase(self, session, started, now):
+        """Return the phase of the lobby tracked by session at time now."""
+        if not started:
+            return WAITING
+        if session.locked_count == len(session.areas):
+            return IDLE
+        if now - session.last_change_time < self.settle_time:
+            return ACTIVE
+        return SETTLED
+
+    def next_deadline(self, deadline, session, started, now):
+        """Return the time of the next tick after the one scheduled at deadline."""
+        interval = self.intervals[self.phase(session, started, now)]
+        deadline += interval
+        if deadline < now:
+            # Overran: skip the ticks we missed and stay on the grid
+            missed = int((now - deadline) // interval) + 1
+            self.skipped_ticks += missed
+            deadline += missed * interval
+        return deadline
@@ -0,0 +1,248 @@
+"""Append-only log of every slot transition (hover, selection, lock) across lobbies.
+
+The scan thread hands events to SessionLog.log(), which only queues them; a writer
+thread flushes them in batches every SESSION_LOG_FLUSH_INTERVAL seconds. Two formats:
+
+- "binary": fixed-size records (RECORD_DTYPE) appended to segment files in
+  SESSION_LOG_FOLDER; a new segment starts once the current one passes
+  SESSION_LOG_SEGMENT_SIZE bytes, so many lobbies share one file. A restarted app
+  appends to the newest segment while it is still under that size.
+- "csv" (opt-in): one lobby_<start time>.csv per lobby, rotated when the next lobby starts.
+
+Lobbies are identified by the wall-clock time their starting screen was seen, in
+milliseconds. Print binary segments as CSV with: python session_log.py SEGMENT...
+"""
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from config import SESSION_LOG_FOLDER, SESSION_LOG_FORMATS, SESSION_LOG_FLUSH_INTERVAL, SESSION_LOG_SEGMENT_SIZE
+
+EVENTS = ("hover", "select", "lock")
+RECORD_DTYPE = np.dtype([('lobby', '<i8'), ('elapsed', '<f4'), ('score', '<f4'), ('area', 'u1'), ('event', 'u1'),
+                         ('agent', 'S30')])
+CSV_HEADER = ['Lobby', 'Event', 'Area', 'Agent', 'Confidence', 'Time (sec)']
+
+# Segment layout: MAGIC, 8-byte little-endian header length, JSON header (the record
+# dtype), zero padding to HEADER_ALIGNMENT, then RECORD_DTYPE records back to back.
+MAGIC = b"VASLOG01"
+HEADER_ALIGNMENT = 64
+
+
+def lobby_label(lobby):
+    return datetime.fromtimestamp(lobby / 1000).strftime('%Y%m%d_%H%M%S')
+
+
+class BinaryLogWriter:
+    """Appends records to size-rotated segment files."""
+
+    def __init__(self, folder, segment_size=SESSION_LOG_SEGMENT_SIZE):
+        self.folder = folder
+        self.segment_size = segment_size
+        self.file = None
+
+    def start_lobby(self, lobby):
+        pass  # Lobbies share segments; each record carries its lobby id
+
+    def write(self, lobby, events):
+        if self.file is None:
+            self._open_segment(resume=True)
+        elif self.file.tell() >= self.segment_size:
+            self._open_segment()
+        records = np.zeros(len(events), dtype=RECORD_DTYPE)
+        records['lobby'] = lobby
+        for record, (event, i, agent_name, score, elapsed) in zip(records, events):
+            record['elapsed'] = elapsed
+            record['score'] = score
+            record['area'] = i + 1
+            record['event'] = EVENTS.index(event)
+            record['agent'] = agent_name.encode()
+        self.file.write(records.tobytes())
+
+    def _open_segment(self, resume=False):
+        """Open a new segment, or with resume the newest one in the folder if it still has room."""
+        self.close()
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._newest_segment() if resume else None
+        if path is not None:
+            try:
+                dtype, offset = _read_header(path)
+            except (OSError, ValueError):
+                dtype = None
+            if dtype == RECORD_DTYPE:
+                # Drop a record torn by a crash so appended records stay aligned
+                with open(path, 'r+b') as f:
+                    f.truncate(offset + (os.path.getsize(path) - offset) // dtype.itemsize * dtype.itemsize)
+                self.file = open(path, 'ab')
+                return
+        path = os.path.join(self.folder, f"events_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.vaslog")
+        header = json.dumps({"dtype": RECORD_DTYPE.descr}).encode()
+        padding = -(len(MAGIC) + 8 + len(header)) % HEADER_ALIGNMENT
+        self.file = open(path, 'ab')
+        self.file.write(MAGIC + len(header).to_bytes(8, 'little') + header + b"\0" * padding)
+
+    def _newest_segment(self):
+        """Path of the newest segment in the folder if it is under the segment size, else None."""
+        segments = sorted(name for name in os.listdir(self.folder)
+                          if name.startswith("events_") and name.endswith(".vaslog"))
+        if not segments:
+            return None
+        path = os.path.join(self.folder, segments[-1])
+        return path if os.path.getsize(path) < self.segment_size else None
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class CsvLogWriter:
+    """Writes one CSV file per lobby."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.file = None
+        self.writer = None
+
+    def start_lobby(self, lobby):
+        self.close()
+
+    def write(self, lobby, events):
+        if self.file is None:
+            os.makedirs(self.folder, exist_ok=True)
+            path = os.path.join(self.folder, f"lobby_{lobby_label(lobby)}.csv")
+            new_file = not os.path.exists(path)
+            self.file = open(path, 'a', newline='')
+            self.writer = csv.writer(self.file)
+            if new_file:
+                self.writer.writerow(CSV_HEADER)
+        for event, i, agent_name, score, elapsed in events:
+            self.writer.writerow([lobby, event, f"Area {i + 1}", agent_name, f"{score:.2f}", f"{elapsed:.2f}"])
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+
+def create_writers(formats, folder):
+    writers = []
+    for log_format in formats:
+        if log_format == "binary":
+            writers.append(BinaryLogWriter(folder))
+        elif log_format == "csv":
+            writers.append(CsvLogWriter(folder))
+        else:
+            raise ValueError(f"Unknown session log format: {log_format}")
+    return writers
+
+
+class SessionLog(threading.Thread):
+    """Background writer for ScanSession events.
+
+    start_lobby() and log() never touch the disk, so they are safe to call from the
+    scan loop. Call close() to write out anything still queued.
+    """
+
+    def __init__(self, folder=SESSION_LOG_FOLDER, formats=SESSION_LOG_FORMATS,
+                 flush_interval=SESSION_LOG_FLUSH_INTERVAL):
+        super().__init__(name="SessionLog", daemon=True)
+        self.writers = create_writers(formats, folder)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.lobby = None
+
+    def start_lobby(self, lobby=None):
+        """Start a new lobby (by default stamped with the current time) and return its id."""
+        self.lobby = int(time.time() * 1000) if lobby is None else lobby
+        self.queue.put(("lobby", self.lobby, None))
+        return self.lobby
+
+    def log(self, events):
+        """Queue (event, area index, agent, score, elapsed) tuples for the current lobby."""
+        if events and self.lobby is not None:
+            self.queue.put(("events", self.lobby, events))
+
+    def close(self, timeout=5.0):
+        self.queue.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        try:
+            while True:
+                # Block for the first item, then gather everything queued within the flush interval
+                batch = [self.queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self.queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                self.write_batch(batch)
+                if batch[-1] is None:
+                    return
+        finally:
+            for writer in self.writers:
+                writer.close()
+
+    def write_batch(self, batch):
+        for item in batch:
+            if item is None:
+                break
+            kind, lobby, events = item
+            for writer in self.writers:
+                if kind == "lobby":
+                    writer.start_lobby(lobby)
+                else:
+                    writer.write(lobby, events)
+        for writer in self.writers:
+            writer.flush()
+
+
+def _read_header(path):
+    """Return (record dtype, offset of the first record) of a binary segment."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session log segment")
+        header_length = int.from_bytes(f.read(8), 'little')
+        dtype = np.dtype([tuple(field) for field in json.loads(f.read(header_length))["dtype"]])
+    offset = len(MAGIC) + 8 + header_length
+    return dtype, offset + -offset % HEADER_ALIGNMENT
+
+
+def read_event_log(path):
+    """Return the records of a binary segment as a RECORD_DTYPE array (a torn last record is ignored)."""
+    dtype, offset = _read_header(path)
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    return np.fromfile(path, dtype=dtype, count=count, offset=offset)
+
+
+def main():
+    writer = csv.writer(sys.stdout)
+    writer.writerow(CSV_HEADER)
+    for path in sys.argv[1:]:
+        for record in read_event_log(path):
+            writer.writerow([record['lobby'], EVENTS[record['event']], f"Area {record['area']}",
+                             record['agent'].decode(), f"{record['score']:.2f}", f"{record['elapsed']:.2f}"])
+
+
+if __name__ == "__main__":
+    main()
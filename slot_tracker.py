@@ -0,0 +1,63 @@
+"""Per-slot state machine that turns noisy per-frame matches into selections and locks.
+
+Every scan feeds each slot's current match into its SlotTracker, which keeps the
+last SLOT_VOTE_WINDOW observations. A slot moves to a new selected (hovered) agent or
+a new lock only when that reference has enough support in the window. Support is
+confidence weighted: a match right at the match threshold counts 1 vote and a perfect one
+2, so two clean frames can lock a slot while a single spurious match cannot. A lock can
+still be corrected if a different locked agent later gathers enough votes. Event times
+are those of the earliest supporting observation, so voting delays the result by a
+frame or two but not the recorded times.
+"""
+from collections import deque
+from config import MATCH_THRESHOLD, SLOT_VOTE_WINDOW, SLOT_SELECT_VOTES, SLOT_LOCK_VOTES
+
+EMPTY = "empty"
+SELECTED = "selected"
+LOCKED = "locked"
+
+
+def vote_weight(score, threshold=MATCH_THRESHOLD):
+    """Votes for one observation: 1 at the match threshold, rising to 2 for a perfect match."""
+    return 1.0 + max(0.0, score - threshold) / (1.0 - threshold)
+
+
+class SlotTracker:
+    """Voting state machine for one agent slot: empty -> selected -> locked."""
+
+    __slots__ = ('window', 'select_votes', 'lock_votes', 'threshold', 'state', 'agent')
+
+    def __init__(self, window=SLOT_VOTE_WINDOW, select_votes=SLOT_SELECT_VOTES, lock_votes=SLOT_LOCK_VOTES,
+                 threshold=MATCH_THRESHOLD):
+        self.window = deque(maxlen=window)  # (reference name or None, score, event time)
+        self.select_votes = select_votes
+        self.lock_votes = lock_votes
+        self.threshold = threshold  # Match threshold of the engine producing the scores
+        self.state = EMPTY
+        self.agent = None
+
+    def observe(self, name, score, event_time):
+        """Add one frame's match (name None if nothing matched).
+
+        Returns ("select" or "lock", reference name, best score, event time) when the slot
+        changes state, otherwise None.
+        """
+        self.window.append((name, score, event_time))
+        if name is None or name == self.agent:
+            return None
+        locking = not name.startswith("selected_")
+        if not locking and self.state == LOCKED:
+            return None  # A locked slot cannot go back to hovering
+        votes = 0.0
+        best_score = 0.0
+        first_time = event_time
+        for seen, seen_score, seen_time in self.window:
+            if seen == name:
+                votes += vote_weight(seen_score, self.threshold)
+                best_score = max(best_score, seen_score)
+                first_time = min(first_time, seen_time)
+        if votes < (self.lock_votes if locking else self.select_votes):
+            return None
+        self.state = LOCKED if locking else SELECTED
+        self.agent = name
+        return ("lock" if locking else "select", name, best_score, first_time)
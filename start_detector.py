@@ -0,0 +1,74 @@
+"""Starting screen detection that costs next to nothing while the game sits in menus.
+
+Each check goes through up to three stages, stopping at the first that decides it:
+
+1. unchanged: the box looks the same as last time (16x16 grey signature), so the
+   previous score is reused.
+2. prefilter: every variant is matched against a downscaled copy of the box; variants
+   scoring below START_PREFILTER_THRESHOLD are rejected without a full-size match.
+3. full: the surviving variants are matched at full size (TM_CCOEFF_NORMED), best
+   prefilter score first, stopping at the first one that reaches START_THRESHOLD.
+"""
+from collections import deque, namedtuple
+import numpy as np
+from config import START_THRESHOLD, START_PREFILTER_SCALE, START_PREFILTER_THRESHOLD, START_HISTORY_SIZE, \
+    CHANGE_THRESHOLD
+from matcher import area_signature, downscale, match_template
+
+# One entry of the confidence history; stage is "unchanged", "prefilter" or "full"
+StartCheck = namedtuple('StartCheck', ['timestamp', 'score', 'variant', 'stage'])
+
+
+class StartScreenDetector:
+    """Matches the starting screen box against one or more starting screen variants.
+
+    score and variant describe the last check; history keeps the last START_HISTORY_SIZE
+    checks as StartCheck tuples.
+    """
+
+    def __init__(self, variants, threshold=START_THRESHOLD, prefilter_scale=START_PREFILTER_SCALE,
+                 prefilter_threshold=START_PREFILTER_THRESHOLD, history_size=START_HISTORY_SIZE):
+        self.variants = variants  # {name: BGR image}
+        self.threshold = threshold
+        self.prefilter_scale = prefilter_scale
+        self.prefilter_threshold = prefilter_threshold
+        self.small_variants = {name: downscale(image, prefilter_scale) for name, image in variants.items()}
+        self.history = deque(maxlen=history_size)
+        self.reset()
+
+    def reset(self):
+        """Forget the last check so the next one is matched from scratch."""
+        self.signature = None
+        self.score = 0.0
+        self.variant = None
+
+    def detect(self, screen_area, timestamp=None):
+        """Return True if screen_area shows one of the starting screen variants."""
+        signature = area_signature(screen_area)
+        if self.signature is not None and np.abs(signature - self.signature).mean() <= CHANGE_THRESHOLD:
+            stage = "unchanged"
+        else:
+            self.signature = signature
+            stage = self._match_variants(screen_area)
+        self.history.append(StartCheck(timestamp, self.score, self.variant, stage))
+        return self.score >= self.threshold
+
+    def _match_variants(self, screen_area):
+        small_area = downscale(screen_area, self.prefilter_scale)
+        candidates = sorted(((match_template(small_area, small)[0], name)
+                             for name, small in self.small_variants.items()), reverse=True)
+        # Until a full-size match runs, report the best prefilter score
+        self.score, self.variant = candidates[0] if candidates else (0.0, None)
+        stage = "prefilter"
+        best = -1.0
+        for coarse_score, name in candidates:
+            if coarse_score < self.prefilter_threshold:
+                break
+            score = match_template(screen_area, self.variants[name])[0]
+            stage = "full"
+            if score > best:
+                best = score
+                self.score, self.variant = score, name
+            if score >= self.threshold:
+                break
+        return stage
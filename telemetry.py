@@ -0,0 +1,93 @@
+"""Opt-in per-stage timing for the scan and render hot path.
+
+Wrap a stage in ``with telemetry.stage("match"):``. While profiling is disabled
+stage() hands back one shared no-op context manager, so instrumented code only
+pays for a function call. When enabled, each stage records (name, start, duration,
+thread) into a fixed-size ring buffer that can be summarised live or dumped as a
+Chrome trace (open in chrome://tracing or https://ui.perfetto.dev).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+import numpy as np
+from config import PROFILING, TELEMETRY_BUFFER_SIZE, TRACE_FOLDER
+
+_NO_OP = nullcontext()
+_events = deque(maxlen=TELEMETRY_BUFFER_SIZE)
+enabled = PROFILING
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        # deque.append is atomic, so the worker and Tk threads can record without a lock
+        _events.append((self.name, self.start, end - self.start, threading.get_ident()))
+        return False
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def stage(name):
+    """Context manager timing one stage; a shared no-op while profiling is disabled."""
+    if not enabled:
+        return _NO_OP
+    return _Stage(name)
+
+
+def clear():
+    _events.clear()
+
+
+def summary(window=5.0):
+    """Return {stage: (count, p50 ms, p95 ms)} for events in the last window seconds, plus the scan rate.
+
+    The scan rate is the number of "scan tick" events per second over the same window.
+    """
+    now = time.perf_counter()
+    durations = {}
+    for name, start, duration, _ in list(_events):
+        if now - start <= window:
+            durations.setdefault(name, []).append(duration * 1000)
+    stages = {name: (len(values), float(np.percentile(values, 50)), float(np.percentile(values, 95)))
+              for name, values in durations.items()}
+    rate = len(durations.get("scan tick", ())) / window
+    return stages, rate
+
+
+def format_summary(window=5.0, stages=("scan tick", "capture", "match", "render")):
+    """One-line text for the GUI overlay."""
+    timings, rate = summary(window)
+    parts = [f"{rate:.1f} scans/s"]
+    for name in stages:
+        if name in timings:
+            _, p50, p95 = timings[name]
+            parts.append(f"{name} {p50:.1f}/{p95:.1f} ms")
+    return " | ".join(parts) + " (p50/p95)"
+
+
+def dump_trace(path=None):
+    """Write the buffered events as a Chrome trace JSON file and return its path."""
+    if path is None:
+        os.makedirs(TRACE_FOLDER, exist_ok=True)
+        path = os.path.join(TRACE_FOLDER, f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": os.getpid(), "tid": thread}
+              for name, start, duration, thread in list(_events)]
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path